@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 AI（expectimax 探索）
+Python 3.8+ で動作
+
+- 盤面は game_2048bb のパック盤面
+- 評価値は行ごとの評価テーブル（65536 通り）を行と列に足し合わせる
+  テーブルは重みを鍵に game_2048tc でキャッシュする（重みを変えると作り直し）
+- 探索結果は search_cache に深さ付きで残し、先読み（Ponderer）やヒント（HintEngine）と共有する
+- 枝刈り（確率の打ち切り・出現マスの間引き）と、空きマス数で深さを変える adaptive_depth は任意
+"""
+
+import threading
+
+import game_2048bb as bb
+import game_2048tc as tc
+
+# ---------- 評価関数 ----------
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+HEURISTIC_VERSION = 1   # _row_heuristic を変えたら上げる
+
+def _row_heuristic(line: list) -> float:
+    empty = 0
+    merges = 0
+    prev = 0
+    counter = 0
+    total = 0.0
+    for e in line:
+        total += e ** SUM_POWER
+        if e == 0:
+            empty += 1
+        else:
+            if prev == e:
+                counter += 1
+            elif counter > 0:
+                merges += 1 + counter
+                counter = 0
+            prev = e
+    if counter > 0:
+        merges += 1 + counter
+
+    mono_left = 0.0
+    mono_right = 0.0
+    for i in range(1, bb.SIZE):
+        a = line[i - 1] ** MONOTONICITY_POWER
+        b = line[i] ** MONOTONICITY_POWER
+        if line[i - 1] > line[i]:
+            mono_left += a - b
+        else:
+            mono_right += b - a
+
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(mono_left, mono_right)
+            - SUM_WEIGHT * total)
+
+def _build_heuristic_table() -> list:
+    return [_row_heuristic([(row >> (4 * i)) & 0xF for i in range(bb.SIZE)])
+            for row in range(65536)]
+
+HEURISTIC, = tc.load(
+    'heuristic',
+    (HEURISTIC_VERSION, LOST_PENALTY, MONOTONICITY_POWER, MONOTONICITY_WEIGHT,
+     SUM_POWER, SUM_WEIGHT, MERGES_WEIGHT, EMPTY_WEIGHT),
+    'd', lambda: [_build_heuristic_table()])
+
+def evaluate(b: int) -> float:
+    """行と列の評価値の合計"""
+    h = HEURISTIC
+    t = bb.transpose(b)
+    return (h[b & 0xFFFF] + h[(b >> 16) & 0xFFFF]
+            + h[(b >> 32) & 0xFFFF] + h[b >> 48]
+            + h[t & 0xFFFF] + h[(t >> 16) & 0xFFFF]
+            + h[(t >> 32) & 0xFFFF] + h[t >> 48])
+
+# ---------- 探索 ----------
+CACHE_LIMIT = 1 << 20
+
+# 盤面 -> (深さ, 値)。チャンス節点（移動後・出現前）の値
+search_cache = {}
+# 盤面 -> (深さ, 方向, 値)。手番節点（出現後）の最善手
+move_cache = {}
+# 複数プロセスで共有する置換表（game_2048tt.SharedTable）。None なら使わない
+# search_cache で足りないときだけ引き、チャンス節点の値を書き込む
+shared_table = None
+
+class Cancelled(Exception):
+    """先読みの打ち切り"""
+
+def clear_cache() -> None:
+    search_cache.clear()
+    move_cache.clear()
+
+# ---------- 枝刈り ----------
+# どちらも 0 なら全幅の expectimax（既定）。変えるときは set_pruning() で（キャッシュも捨てる）
+PROB_CUTOFF = 0.0    # 根からの到達確率がこれ未満のチャンス節点は展開せず評価値で打ち切る
+SAMPLE_CELLS = 0     # 空きマスがこれより多いときは、等間隔に選んだこの数のマスだけ読む
+
+# 展開した手番節点の数（枝刈りの効き目を測る用）
+nodes = 0
+
+def set_pruning(prob_cutoff: float = 0.0, sample_cells: int = 0) -> None:
+    global PROB_CUTOFF, SAMPLE_CELLS
+    PROB_CUTOFF = prob_cutoff
+    SAMPLE_CELLS = sample_cells
+    clear_cache()
+
+def adaptive_depth(b: int, base: int = 3) -> int:
+    """空きマスが多い（分岐が多く、急ぐ必要もない）ときは浅く、少ないときは深く読む"""
+    empty = bb.count_empty(b)
+    if empty > 8:
+        return max(1, base - 1)
+    if empty <= 3:
+        return base + 1
+    return base
+
+def _max_node(b: int, depth: int, stop, prob: float = 1.0) -> tuple:
+    global nodes
+    hit = move_cache.get(b)
+    if hit is not None and hit[0] >= depth:
+        return hit[1], hit[2]
+    if stop is not None and stop.is_set():
+        raise Cancelled
+    nodes += 1
+    best_dir = None
+    best = 0.0
+    for d in range(4):
+        nb, moved, _ = bb.move(b, d)
+        if not moved:
+            continue
+        v = _chance_node(nb, depth - 1, stop, prob)
+        if best_dir is None or v > best:
+            best_dir, best = d, v
+    if len(move_cache) >= CACHE_LIMIT:
+        move_cache.clear()
+    move_cache[b] = (depth, best_dir, best)
+    return best_dir, best
+
+def _chance_node(b: int, depth: int, stop, prob: float = 1.0) -> float:
+    if depth <= 0:
+        return evaluate(b)
+    hit = search_cache.get(b)
+    if (hit is None or hit[0] < depth) and shared_table is not None:
+        shared = shared_table.get(b)
+        if shared is not None and (hit is None or shared[0] > hit[0]):
+            hit = shared
+    if hit is not None and hit[0] >= depth:
+        return hit[1]
+    if prob < PROB_CUTOFF:
+        return evaluate(b)
+    empty = bb.empty_shifts(b)
+    if not empty:
+        return evaluate(b)
+    n = len(empty)
+    if SAMPLE_CELLS and n > SAMPLE_CELLS:
+        empty = [empty[i * n // SAMPLE_CELLS] for i in range(SAMPLE_CELLS)]
+        n = SAMPLE_CELLS
+    p2 = prob * 0.9 / n
+    p4 = prob * 0.1 / n
+    total = 0.0
+    for s in empty:
+        total += 0.9 * _max_node(b | 1 << s, depth, stop, p2)[1]
+        total += 0.1 * _max_node(b | 2 << s, depth, stop, p4)[1]
+    v = total / n
+    if len(search_cache) >= CACHE_LIMIT:
+        search_cache.clear()
+    search_cache[b] = (depth, v)
+    if shared_table is not None:
+        shared_table.put(b, depth, v)
+    return v
+
+def best_move(b: int, depth: int = 2, stop=None) -> tuple:
+    """
+    depth 手先まで読んだ最善手
+    Returns: (direction_int or None, value)
+    """
+    return _max_node(b, depth, stop)
+
+def chance_value(b: int, depth: int, stop=None) -> float:
+    """移動直後（出現前）の盤面の期待値"""
+    return _chance_node(b, depth, stop)
+
+# ---------- バックグラウンド探索 ----------
+PONDER_DEPTH = 3
+HINT_DEPTH = 3
+
+class _Worker:
+    """
+    盤面ごとに 1 本の探索スレッドを立て、盤面が変わったら打ち切る
+    スレッドでは run(b, stop) を呼ぶ（Cancelled で抜けたら黙って終わる）
+    """
+
+    def __init__(self, max_depth: int, run):
+        self.max_depth = max_depth
+        self._target = run
+        self.depth_done = 0
+        self._thread = None
+        self._stop = None
+
+    def start(self, b: int) -> None:
+        self.stop()
+        self.depth_done = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._guarded_run,
+                                        args=(b, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _guarded_run(self, b: int, stop) -> None:
+        try:
+            self._target(b, stop)
+        except Cancelled:
+            pass
+
+class Ponderer(_Worker):
+    """
+    相手の手番中にバックグラウンドで探索するスレッド
+
+    相手が指しうる各方向の移動後盤面について、出現後の手番節点を
+    浅い順に読んで search_cache / move_cache に書き込む。
+    相手が指したら stop() で止め、こちらは best_move() でキャッシュを引く。
+    """
+
+    def __init__(self, max_depth: int = PONDER_DEPTH):
+        super().__init__(max_depth, self._run)
+
+    def _run(self, b: int, stop) -> None:
+        afters = []
+        for d in range(4):
+            nb, moved, _ = bb.move(b, d)
+            if moved:
+                afters.append(nb)
+        for depth in range(1, self.max_depth + 1):
+            for nb in afters:
+                _chance_node(nb, depth, stop)
+            self.depth_done = depth
+
+class HintEngine(_Worker):
+    """
+    ヒント用の非同期探索
+
+    request() で盤面を渡すとスレッドで 1 手ずつ深く読み、読み終えた深さの
+    結果を result() で取れるようにする。盤面が変わると前の探索は打ち切られるが、
+    キャッシュ済みの結果はそのまま使い、その深さの続きから読む。
+    """
+
+    def __init__(self, max_depth: int = HINT_DEPTH):
+        super().__init__(max_depth, self._run)
+        self._board = None
+        self._result = None
+        self._lock = threading.Lock()
+
+    def request(self, b: int) -> None:
+        if b == self._board:
+            return
+        with self._lock:
+            self._board = b
+            self._result = None
+        self.start(b)
+
+    def cancel(self) -> None:
+        """探索を止めて結果を捨てる"""
+        self.stop()
+        with self._lock:
+            self._board = None
+            self._result = None
+
+    def result(self):
+        """(depth, direction_int or None, value) か、まだなら None"""
+        with self._lock:
+            return self._result
+
+    def _publish(self, b: int, depth: int, d, v: float) -> None:
+        with self._lock:
+            if b == self._board:
+                self._result = (depth, d, v)
+        self.depth_done = depth
+
+    def _run(self, b: int, stop) -> None:
+        first = 1
+        hit = move_cache.get(b)
+        if hit is not None:
+            self._publish(b, *hit)
+            first = hit[0] + 1
+        for depth in range(first, self.max_depth + 1):
+            d, v = _max_node(b, depth, stop)
+            self._publish(b, depth, d, v)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 高速エンジン（64bit パック盤面 + 行テーブル）
+Python 3.8+ で動作
+
+- 盤面は 1 つの int に 4bit × 16 マスで詰める（値は log2 の指数）
+- マス (r, c) は下位から 4 * (4 * r + c) bit 目
+- 行（16bit）の左右移動とスコアは 65536 通り全部を表にする
+  （game_2048tc でディスクにキャッシュし、2 回目以降は mmap で読むだけ）
+- Zobrist ハッシュ（マス × 指数の乱数の XOR）は、移動なら行 / 列ごとの差分表 4 回、
+  出現なら 1 マス分の XOR で更新できる（差分表も game_2048tc でキャッシュする）
+"""
+
+import random
+
+import game_2048tc as tc
+
+SIZE = 4
+
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = ('up', 'down', 'left', 'right')
+
+ROW_MASK = 0xFFFF
+MAX_EXP = 15          # 4bit に入る最大指数（32768）
+TABLE_VERSION = 1     # 行テーブルの中身を変えたら上げる（キャッシュを作り直す）
+
+# ---------- 行テーブル ----------
+def _slide_row(line: list) -> tuple:
+    """指数のリストを左に詰めてマージ（1 タイル 1 回まで）"""
+    tiles = [e for e in line if e]
+    out = []
+    score = 0
+    i = 0
+    while i < len(tiles):
+        e = tiles[i]
+        if i + 1 < len(tiles) and tiles[i + 1] == e and e < MAX_EXP:
+            out.append(e + 1)
+            score += 1 << (e + 1)
+            i += 2
+        else:
+            out.append(e)
+            i += 1
+    out += [0] * (SIZE - len(out))
+    return out, score
+
+def _reverse_row(row: int) -> int:
+    return (((row & 0xF) << 12) | ((row & 0xF0) << 4)
+            | ((row >> 4) & 0xF0) | (row >> 12))
+
+def _build_tables() -> tuple:
+    left = [0] * 65536
+    left_score = [0] * 65536
+    for row in range(65536):
+        line = [(row >> (4 * i)) & 0xF for i in range(SIZE)]
+        out, score = _slide_row(line)
+        left[row] = out[0] | out[1] << 4 | out[2] << 8 | out[3] << 12
+        left_score[row] = score
+    right = [0] * 65536
+    right_score = [0] * 65536
+    for row in range(65536):
+        rev = _reverse_row(row)
+        right[row] = _reverse_row(left[rev])
+        right_score[row] = left_score[rev]
+    return left, right, left_score, right_score
+
+ROW_LEFT, ROW_RIGHT, ROW_LEFT_SCORE, ROW_RIGHT_SCORE = tc.load(
+    'rows', (TABLE_VERSION, SIZE), 'HHII', _build_tables)
+
+# ---------- 盤面の変換 ----------
+def pack(board: list) -> int:
+    """リスト盤面（値そのまま）→ パック盤面"""
+    b = 0
+    shift = 0
+    for row in board:
+        for val in row:
+            if val:
+                b |= (val.bit_length() - 1) << shift
+            shift += 4
+    return b
+
+def unpack(b: int) -> list:
+    """パック盤面 → リスト盤面（値そのまま）"""
+    board = []
+    for r in range(SIZE):
+        row = []
+        for c in range(SIZE):
+            e = (b >> (4 * (SIZE * r + c))) & 0xF
+            row.append(1 << e if e else 0)
+        board.append(row)
+    return board
+
+def transpose(b: int) -> int:
+    """行↔列（4x4 のニブル行列を転置）"""
+    a1 = b & 0xF0F00F0FF0F00F0F
+    a2 = b & 0x0000F0F00000F0F0
+    a3 = b & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+# ---------- 移動 ----------
+def _apply(b: int, table: list, score_table: list) -> tuple:
+    r0 = b & ROW_MASK
+    r1 = (b >> 16) & ROW_MASK
+    r2 = (b >> 32) & ROW_MASK
+    r3 = b >> 48
+    nb = (table[r0] | table[r1] << 16
+          | table[r2] << 32 | table[r3] << 48)
+    gained = (score_table[r0] + score_table[r1]
+              + score_table[r2] + score_table[r3])
+    return nb, gained
+
+def move(b: int, direction: int) -> tuple:
+    """
+    direction: UP / DOWN / LEFT / RIGHT
+    Returns: (new_board, moved_bool, gained)
+    """
+    if direction == LEFT:
+        nb, gained = _apply(b, ROW_LEFT, ROW_LEFT_SCORE)
+    elif direction == RIGHT:
+        nb, gained = _apply(b, ROW_RIGHT, ROW_RIGHT_SCORE)
+    elif direction == UP:
+        nb, gained = _apply(transpose(b), ROW_LEFT, ROW_LEFT_SCORE)
+        nb = transpose(nb)
+    elif direction == DOWN:
+        nb, gained = _apply(transpose(b), ROW_RIGHT, ROW_RIGHT_SCORE)
+        nb = transpose(nb)
+    else:
+        return b, False, 0
+    return nb, nb != b, gained
+
+def legal_moves(b: int) -> int:
+    """動ける方向を 4bit のマスクで返す（bit d が方向 d）"""
+    mask = 0
+    t = transpose(b)
+    for d, src, table in ((UP, t, ROW_LEFT), (DOWN, t, ROW_RIGHT),
+                          (LEFT, b, ROW_LEFT), (RIGHT, b, ROW_RIGHT)):
+        for shift in (0, 16, 32, 48):
+            row = (src >> shift) & ROW_MASK
+            if table[row] != row:
+                mask |= 1 << d
+                break
+    return mask
+
+# ---------- Zobrist ハッシュ ----------
+ZOBRIST_SEED = 2048
+
+def _build_zobrist() -> tuple:
+    """
+    マス × 指数ごとの 64bit 乱数（指数 0 = 空きは 0）と、
+    それを 1 バイト（2 マス）ずつまとめた 8 × 256 の表
+    """
+    rng = random.Random(ZOBRIST_SEED)
+    cell = [0] * (16 * 16)
+    for i in range(16):
+        for e in range(1, 16):
+            cell[i * 16 + e] = rng.getrandbits(64)
+    byte = [[cell[2 * k * 16 + (v & 0xF)] ^ cell[(2 * k + 1) * 16 + (v >> 4)]
+             for v in range(256)] for k in range(8)]
+    return cell, byte
+
+ZOBRIST_CELL, ZOBRIST_BYTE = _build_zobrist()
+
+def zobrist(b: int) -> int:
+    """盤面全体のハッシュ（8 回の表引き）"""
+    t0, t1, t2, t3, t4, t5, t6, t7 = ZOBRIST_BYTE
+    return (t0[b & 0xFF] ^ t1[(b >> 8) & 0xFF] ^ t2[(b >> 16) & 0xFF]
+            ^ t3[(b >> 24) & 0xFF] ^ t4[(b >> 32) & 0xFF] ^ t5[(b >> 40) & 0xFF]
+            ^ t6[(b >> 48) & 0xFF] ^ t7[b >> 56])
+
+def _build_zobrist_moves() -> list:
+    """
+    方向 × 位置（左右は行、上下は列）ごとに、16bit の行から
+    「移動前の行のハッシュ ^ 移動後の行のハッシュ」を引く 65536 要素の表（UP, DOWN, LEFT, RIGHT の順に 4 つずつ）
+    """
+    cell = ZOBRIST_CELL
+    tables = []
+    for d in (UP, DOWN, LEFT, RIGHT):
+        slide = ROW_LEFT if d in (UP, LEFT) else ROW_RIGHT
+        for k in range(SIZE):
+            # 行の i 番目のニブルは、左右なら行 k の i 列目、上下なら列 k の i 行目（転置した盤面の行）
+            idx = [SIZE * k + i if d in (LEFT, RIGHT) else SIZE * i + k for i in range(SIZE)]
+            lo = [cell[idx[0] * 16 + (v & 0xF)] ^ cell[idx[1] * 16 + (v >> 4)] for v in range(256)]
+            hi = [cell[idx[2] * 16 + (v & 0xF)] ^ cell[idx[3] * 16 + (v >> 4)] for v in range(256)]
+            row_hash = [lo[row & 0xFF] ^ hi[row >> 8] for row in range(65536)]
+            tables.append([row_hash[row] ^ row_hash[slide[row]] for row in range(65536)])
+    return tables
+
+# 方向ごとの差分表（ZOBRIST_MOVE[方向][位置]）。キャッシュで 8 MB、キャッシュなしではリストで
+# 数十 MB になるので import では読まず、zobrist_move / move_hashed を初めて呼んだときに読む
+ZOBRIST_MOVE = None
+
+def load_zobrist_moves() -> list:
+    """差分表を（まだなら）読んで返す"""
+    global ZOBRIST_MOVE
+    if ZOBRIST_MOVE is None:
+        tables = tc.load('zobrist_moves', (TABLE_VERSION, ZOBRIST_SEED), 'Q' * 16,
+                         _build_zobrist_moves)
+        ZOBRIST_MOVE = [tables[4 * d:4 * d + 4] for d in range(4)]
+    return ZOBRIST_MOVE
+
+def zobrist_move(h: int, b: int, direction: int) -> int:
+    """b のハッシュ h を、direction へ移動した後の盤面のハッシュにする（差分表を 4 回引く）"""
+    src = transpose(b) if direction == UP or direction == DOWN else b
+    z0, z1, z2, z3 = (ZOBRIST_MOVE or load_zobrist_moves())[direction]
+    return (h ^ z0[src & ROW_MASK] ^ z1[(src >> 16) & ROW_MASK]
+            ^ z2[(src >> 32) & ROW_MASK] ^ z3[src >> 48])
+
+def zobrist_spawn(h: int, before: int, after: int) -> int:
+    """1 マス出現しただけの盤面のハッシュ（出現していなければ h のまま）"""
+    x = before ^ after
+    if not x:
+        return h
+    s = (x.bit_length() - 1) & ~3
+    return h ^ ZOBRIST_CELL[(s >> 2) * 16 + ((after >> s) & 0xF)]
+
+def move_hashed(b: int, h: int, direction: int) -> tuple:
+    """
+    move() とハッシュの更新を 1 回の行の取り出しで行う
+    Returns: (new_board, new_hash, moved_bool, gained)
+    """
+    vertical = direction == UP or direction == DOWN
+    src = transpose(b) if vertical else b
+    if direction == UP or direction == LEFT:
+        table, score_table = ROW_LEFT, ROW_LEFT_SCORE
+    else:
+        table, score_table = ROW_RIGHT, ROW_RIGHT_SCORE
+    r0 = src & ROW_MASK
+    r1 = (src >> 16) & ROW_MASK
+    r2 = (src >> 32) & ROW_MASK
+    r3 = src >> 48
+    nb = table[r0] | table[r1] << 16 | table[r2] << 32 | table[r3] << 48
+    if nb == src:
+        return b, h, False, 0
+    z0, z1, z2, z3 = (ZOBRIST_MOVE or load_zobrist_moves())[direction]
+    h ^= z0[r0] ^ z1[r1] ^ z2[r2] ^ z3[r3]
+    gained = score_table[r0] + score_table[r1] + score_table[r2] + score_table[r3]
+    return (transpose(nb) if vertical else nb), h, True, gained
+
+# ---------- 出現・判定 ----------
+def empty_shifts(b: int) -> list:
+    """空きマスの bit 位置一覧"""
+    return [s for s in range(0, 64, 4) if not (b >> s) & 0xF]
+
+def count_empty(b: int) -> int:
+    n = 0
+    for s in range(0, 64, 4):
+        if not (b >> s) & 0xF:
+            n += 1
+    return n
+
+def add_random_tile(b: int, rng=random) -> int:
+    """空きマスに 2 か 4 を置いた盤面を返す"""
+    empty = empty_shifts(b)
+    if not empty:
+        return b
+    s = rng.choice(empty)
+    return b | (2 if rng.random() < 0.1 else 1) << s
+
+def add_random_tile_hashed(b: int, h: int, rng=random) -> tuple:
+    """add_random_tile と同じ乱数の使い方で、ハッシュも 1 マス分だけ更新する"""
+    empty = empty_shifts(b)
+    if not empty:
+        return b, h
+    s = rng.choice(empty)
+    e = 2 if rng.random() < 0.1 else 1
+    return b | e << s, h ^ ZOBRIST_CELL[(s >> 2) * 16 + e]
+
+def new_game(rng=random) -> int:
+    return add_random_tile(add_random_tile(0, rng), rng)
+
+def max_exponent(b: int) -> int:
+    m = 0
+    while b:
+        if b & 0xF > m:
+            m = b & 0xF
+        b >>= 4
+    return m
+
+def max_tile(b: int) -> int:
+    e = max_exponent(b)
+    return 1 << e if e else 0
+
+def lost(b: int) -> bool:
+    return legal_moves(b) == 0
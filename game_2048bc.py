@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 観戦配信（差分エンコード + 購読者ごとの有限キュー）
+Python 3.8+ で動作
+
+- 更新は盤面ではなく差分で送る
+    M: 移動方向 + 出現マス + 出現値          7 バイト
+    D: 変わったマスの (マス, 指数) の並び   6 + n バイト（Undo やリスタート用）
+    K: 盤面まるごと（購読開始時）          13 バイト
+- 購読者ごとに上限付きの asyncio.Queue。溢れた購読者は切り捨て、ゲームは待たない
+  切られた購読者のキューは空にして DROPPED だけを入れる。受け手はそれを見て subscribe し直す
+  （最初にキーフレームが届くので、そこから追いつける）
+
+  python game_2048bc.py --subscribers 10000 --moves 200
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+
+import game_2048bb as bb
+
+QUEUE_SIZE = 64
+DROPPED = b'X'        # 切断の合図（更新メッセージはどれも 5 バイト以上なので区別できる）
+
+_HEAD = struct.Struct('<cI')          # 種別, 通し番号
+_MOVE = struct.Struct('<cIBB')        # M, seq, 方向, (マス << 4 | 指数)
+_KEY = struct.Struct('<cIQ')          # K, seq, 盤面
+
+# ---------- エンコード ----------
+def encode_move(seq: int, before_spawn: int, d: int, after: int) -> bytes:
+    """移動後（出現前）と出現後の盤面から、移動 + 出現の 1 更新を作る"""
+    x = after ^ before_spawn
+    if x:
+        cell = (x.bit_length() - 1) // 4
+        spawn = cell << 4 | (x >> (4 * cell))
+    else:
+        spawn = 0xFF                   # 出現なし
+    return _MOVE.pack(b'M', seq, d, spawn)
+
+def encode_diff(seq: int, old: int, new: int) -> bytes:
+    cells = bytearray()
+    x = old ^ new
+    for cell in range(16):
+        if (x >> (4 * cell)) & 0xF:
+            cells.append(cell << 4 | ((new >> (4 * cell)) & 0xF))
+    return _HEAD.pack(b'D', seq) + bytes((len(cells),)) + bytes(cells)
+
+def encode_key(seq: int, b: int) -> bytes:
+    return _KEY.pack(b'K', seq, b)
+
+def apply(b: int, msg: bytes) -> tuple:
+    """更新を盤面に当てる。Returns: (seq, new_board)"""
+    kind, seq = _HEAD.unpack_from(msg)
+    if kind == b'M':
+        _, _, d, spawn = _MOVE.unpack(msg)
+        b, _, _ = bb.move(b, d)
+        if spawn != 0xFF:
+            b |= (spawn & 0xF) << (4 * (spawn >> 4))
+    elif kind == b'D':
+        n = msg[_HEAD.size]
+        for v in msg[_HEAD.size + 1:_HEAD.size + 1 + n]:
+            shift = 4 * (v >> 4)
+            b = (b & ~(0xF << shift)) | (v & 0xF) << shift
+    elif kind == b'K':
+        _, _, b = _KEY.unpack(msg)
+    else:
+        raise ValueError(f"unknown update {kind!r}")
+    return seq, b
+
+# ---------- 配信 ----------
+class Subscriber:
+    __slots__ = ('queue', 'dropped')
+
+    def __init__(self, size: int):
+        self.queue = asyncio.Queue(size)
+        self.dropped = False
+
+class Broadcast:
+    """1 ゲームの配信チャネル"""
+
+    def __init__(self, board: int, queue_size: int = QUEUE_SIZE):
+        self.board = board
+        self.seq = 0
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.finished = False
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.queue_size)
+        sub.queue.put_nowait(encode_key(self.seq, self.board))
+        if self.finished:
+            sub.queue.put_nowait(None)      # 終わった後の購読は最後の盤面だけ
+        else:
+            self.subscribers.add(sub)
+        return sub
+
+    def finish(self) -> None:
+        """
+        配信の終わりを全員に知らせる（None が届く）
+        キューが溢れている購読者は待たずに切る（DROPPED で購読し直すと、最後の盤面と None が届く）
+        """
+        self.finished = True
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                self._drop(sub)
+        self.subscribers.clear()
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+
+    def _publish(self, msg: bytes) -> None:
+        self.published += 1
+        slow = []
+        for sub in self.subscribers:
+            try:
+                sub.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                slow.append(sub)
+        for sub in slow:
+            # 追いつけない購読者は切る（ゲーム側は決して待たない）
+            self._drop(sub)
+        n = len(self.subscribers)
+        self.delivered += n
+        self.bytes_sent += n * len(msg)
+
+    def _drop(self, sub: Subscriber) -> None:
+        """古い更新は捨て、切られたことだけを伝える（受け手が queue.get() で待ち続けないように）"""
+        sub.dropped = True
+        self.subscribers.discard(sub)
+        self.dropped += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(DROPPED)
+
+    def publish_move(self, before_spawn: int, d: int, after: int) -> None:
+        self.seq += 1
+        self.board = after
+        self._publish(encode_move(self.seq, before_spawn, d, after))
+
+    def publish_board(self, new: int) -> None:
+        """Undo やリスタートなど、移動以外で盤面が変わったとき"""
+        self.seq += 1
+        msg = encode_diff(self.seq, self.board, new)
+        self.board = new
+        self._publish(msg)
+
+# ---------- ベンチマーク ----------
+async def _watch(game: Broadcast, delay: float, result: list) -> None:
+    sub = game.subscribe()
+    b = 0
+    expect = None
+    while True:
+        msg = await sub.queue.get()
+        if msg is None:
+            break
+        if msg is DROPPED:
+            # 切られたら購読し直し、キーフレームから続ける
+            sub = game.subscribe()
+            expect = None
+            continue
+        seq, b = apply(b, msg)
+        if expect is not None and seq != expect:
+            raise AssertionError(f"gap: got {seq}, expected {expect}")
+        expect = seq + 1
+        if delay:
+            await asyncio.sleep(delay)
+    result.append(b)
+
+async def bench(subscribers: int, moves: int, slow: float) -> str:
+    rng = random.Random(0)
+    game = Broadcast(bb.new_game(rng))
+    results = []
+    n_slow = int(subscribers * slow)
+    tasks = [asyncio.create_task(_watch(game, 0.05 if i < n_slow else 0.0, results))
+             for i in range(subscribers)]
+    await asyncio.sleep(0)             # 全員が購読してから始める
+
+    t0 = time.perf_counter()
+    for _ in range(moves):
+        mask = bb.legal_moves(game.board)
+        if not mask:
+            game.publish_board(bb.new_game(rng))
+        else:
+            d = rng.choice([d for d in range(4) if mask >> d & 1])
+            nb, _, _ = bb.move(game.board, d)
+            game.publish_move(nb, d, bb.add_random_tile(nb, rng))
+        await asyncio.sleep(0)         # 購読者に 1 回ずつ順番を回す
+    elapsed = time.perf_counter() - t0
+
+    # 終わりを知らせる（切られた購読者も購読し直すので、全員が最後の盤面まで受け取る）
+    game.finish()
+    await asyncio.gather(*tasks)
+
+    ok = sum(b == game.board for b in results)
+    full = _KEY.size * game.delivered
+    return (f"{subscribers} subscribers, {moves} updates in {elapsed:.2f}s: "
+            f"{game.delivered / elapsed:.0f} deliveries/s, "
+            f"{game.dropped} drops of slow subscribers (each resubscribed), "
+            f"{ok}/{len(results)} in sync at the end\n"
+            f"bytes sent {game.bytes_sent} "
+            f"({game.bytes_sent / max(game.delivered, 1):.1f}/update, "
+            f"full boards would be {full})")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the spectator broadcast")
+    ap.add_argument('--subscribers', type=int, default=10000)
+    ap.add_argument('--moves', type=int, default=200)
+    ap.add_argument('--slow', type=float, default=0.01,
+                    help="fraction of subscribers that lag behind")
+    args = ap.parse_args(argv)
+    print(asyncio.run(bench(args.subscribers, args.moves, args.slow)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
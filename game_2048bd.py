@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 盤面クラス（__slots__ + 16 バイトの指数列）
+Python 3.8+ で動作
+
+- Board は 16 マスの log2 指数を bytes で 1 つだけ持つ（マス (r, c) は 4 * r + c 番目）
+- bytes は書き換えないので、copy() は中身を共有するだけ（コピーオンライト）
+  move() / add_random_tile() は新しい bytes に差し替える
+- 行の移動とスコアは game_2048bb の行テーブルを使う
+- UI 向けにリスト盤面（値そのまま）と相互に変換できる
+
+  python game_2048bd.py --boards 100000
+"""
+
+import argparse
+import copy
+import random
+import sys
+import time
+import tracemalloc
+
+import game_2048bb as bb
+import game_2048tc as tc
+
+SIZE = 4
+UP, DOWN, LEFT, RIGHT = bb.UP, bb.DOWN, bb.LEFT, bb.RIGHT
+
+# 16bit の行 → 4 バイトの指数列（65536 行 × 4 バイトを 1 つの表に並べる）
+_ROW_CELLS, = tc.load('row_cells', SIZE, 'B', lambda: [bytes(
+    (row >> shift) & 0xF for row in range(65536) for shift in (0, 4, 8, 12))])
+
+class Board:
+    """1 盤面。cells は書き換えない bytes なので、コピーは参照を渡すだけ"""
+
+    __slots__ = ('cells',)
+
+    def __init__(self, cells: bytes = bytes(SIZE * SIZE)):
+        self.cells = cells
+
+    # ---------- 変換 ----------
+    @classmethod
+    def from_list(cls, board: list) -> 'Board':
+        """リスト盤面（値そのまま）から"""
+        cells = bytes(val.bit_length() - 1 if val else 0
+                      for row in board for val in row)
+        if max(cells) > bb.MAX_EXP:
+            raise ValueError(f"tile above {1 << bb.MAX_EXP} cannot be stored")
+        return cls(cells)
+
+    def to_list(self) -> list:
+        c = self.cells
+        return [[1 << e if e else 0 for e in c[i:i + SIZE]]
+                for i in range(0, SIZE * SIZE, SIZE)]
+
+    @classmethod
+    def from_packed(cls, b: int) -> 'Board':
+        return cls(bytes((b >> (4 * i)) & 0xF for i in range(SIZE * SIZE)))
+
+    def packed(self) -> int:
+        b = 0
+        for i, e in enumerate(self.cells):
+            b |= e << (4 * i)
+        return b
+
+    def copy(self) -> 'Board':
+        return Board(self.cells)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo) -> 'Board':
+        return Board(self.cells)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Board) and self.cells == other.cells
+
+    def __getitem__(self, rc: tuple) -> int:
+        e = self.cells[rc[0] * SIZE + rc[1]]
+        return 1 << e if e else 0
+
+    def __repr__(self) -> str:
+        return f"Board({self.to_list()!r})"
+
+    # ---------- 移動 ----------
+    def move(self, direction: int) -> tuple:
+        """
+        direction: UP / DOWN / LEFT / RIGHT
+        盤面を差し替える。Returns: (moved_bool, gained)
+        """
+        c = self.cells
+        if direction in (LEFT, UP):
+            table, scores = bb.ROW_LEFT, bb.ROW_LEFT_SCORE
+        else:
+            table, scores = bb.ROW_RIGHT, bb.ROW_RIGHT_SCORE
+        out = bytearray(SIZE * SIZE)
+        gained = 0
+        if direction in (LEFT, RIGHT):
+            for i in (0, 4, 8, 12):
+                row = c[i] | c[i + 1] << 4 | c[i + 2] << 8 | c[i + 3] << 12
+                new = table[row] * 4
+                out[i:i + 4] = _ROW_CELLS[new:new + 4]
+                gained += scores[row]
+        else:
+            for i in (0, 1, 2, 3):
+                col = c[i] | c[i + 4] << 4 | c[i + 8] << 8 | c[i + 12] << 12
+                new = table[col] * 4
+                out[i::4] = _ROW_CELLS[new:new + 4]
+                gained += scores[col]
+        if out == c:
+            return False, 0
+        self.cells = bytes(out)
+        return True, gained
+
+    # ---------- 出現・判定 ----------
+    def empty_cells(self) -> list:
+        return [i for i, e in enumerate(self.cells) if not e]
+
+    def add_random_tile(self, rng=random) -> None:
+        empty = self.empty_cells()
+        if not empty:
+            return
+        i = rng.choice(empty)
+        out = bytearray(self.cells)
+        out[i] = 2 if rng.random() < 0.1 else 1
+        self.cells = bytes(out)
+
+    def can_move(self) -> bool:
+        c = self.cells
+        if 0 in c:
+            return True
+        for i in range(SIZE * SIZE):
+            if i % SIZE < SIZE - 1 and c[i] == c[i + 1]:
+                return True
+            if i < SIZE * (SIZE - 1) and c[i] == c[i + SIZE]:
+                return True
+        return False
+
+    def max_tile(self) -> int:
+        e = max(self.cells)
+        return 1 << e if e else 0
+
+def new_game(rng=random) -> Board:
+    board = Board()
+    board.add_random_tile(rng)
+    board.add_random_tile(rng)
+    return board
+
+# ---------- ベンチマーク ----------
+def _traced_bytes(make) -> tuple:
+    tracemalloc.start()
+    objs = make()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objs, size
+
+def bench(n: int) -> str:
+    rng = random.Random(0)
+    packed = [bb.new_game(rng) for _ in range(n)]
+    lists, list_bytes = _traced_bytes(lambda: [bb.unpack(b) for b in packed])
+    boards, board_bytes = _traced_bytes(lambda: [Board.from_packed(b) for b in packed])
+
+    # Undo スタックに積むのはコピーなので、コピー 1 つぶんの増え方も見る
+    _, deep_bytes = _traced_bytes(lambda: [copy.deepcopy(b) for b in lists])
+    _, cow_bytes = _traced_bytes(lambda: [b.copy() for b in boards])
+
+    t0 = time.perf_counter()
+    for board in lists:
+        copy.deepcopy(board)
+    t1 = time.perf_counter()
+    for board in boards:
+        board.copy()
+    t2 = time.perf_counter()
+    deep, cow = (t1 - t0) / n * 1e6, (t2 - t1) / n * 1e6
+
+    t0 = time.perf_counter()
+    moved = 0
+    for board in boards:
+        moved += board.move(rng.randrange(4))[0]
+    t1 = time.perf_counter()
+    return (f"{n} boards\n"
+            f"memory: list {list_bytes / n:.0f} bytes/board, "
+            f"Board {board_bytes / n:.0f} bytes/board "
+            f"({list_bytes / max(board_bytes, 1):.1f}x smaller); per copy "
+            f"{deep_bytes / n:.0f} vs {cow_bytes / n:.0f} bytes "
+            f"({deep_bytes / max(cow_bytes, 1):.1f}x smaller)\n"
+            f"copy: deepcopy {deep:.2f} us, Board.copy {cow:.3f} us "
+            f"({deep / max(cow, 1e-9):.0f}x faster)\n"
+            f"move: {(t1 - t0) / n * 1e6:.2f} us/move ({moved} moved)")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the slotted Board class")
+    ap.add_argument('--boards', type=int, default=100000)
+    args = ap.parse_args(argv)
+    print(bench(args.boards))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
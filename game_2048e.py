@@ -1,7 +1,9 @@
 import random
 import os
 import sys
-import copy
+
+import game_2048bb as bb
+from game_2048hist import History
 
 if os.name == 'nt':
     import msvcrt
@@ -10,6 +12,7 @@ else:
     import termios
 
 SIZE = 4
+SCRUB_STEP = 10   # [ ] で動く手数
 
 def init_board():
     board = [[0] * SIZE for _ in range(SIZE)]
@@ -17,10 +20,11 @@ def init_board():
     add_random_tile(board)
     return board
 
-def print_board(board, score):
+def print_board(board, score, pos=0, total=0):
     os.system('cls' if os.name == 'nt' else 'clear')
     print(f"2048 Game (Use H/J/K/L to move, U to undo, R to redo, Q to quit)")
-    print(f"Score: {score}\n")
+    print(f"[ / ] to scrub {SCRUB_STEP} moves, G to go to a move")
+    print(f"Score: {score}  Move: {pos}/{total}\n")
     for row in board:
         print("+------+------+------+------+")
         for val in row:
@@ -105,50 +109,68 @@ def get_key():
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
         return ch.lower()
 
+def read_move_number(total):
+    """G キーの後に手数を入力させる（不正なら None）"""
+    try:
+        n = int(input(f"Go to move (0-{total}): "))
+    except (ValueError, EOFError):
+        return None
+    return n if 0 <= n <= total else None
+
 def main():
     board = init_board()
     score = 0
 
-    undo_stack = []
-    redo_stack = []
+    # 履歴はチェックポイント + 1 手 1 バイト。pos は今見ている手数
+    history = History(bb.pack(board))
+    pos = 0
+
+    def seek(n):
+        b, s = history.seek(n)
+        return bb.unpack(b), s
 
     while True:
-        print_board(board, score)
+        print_board(board, score, pos, len(history))
         key = get_key()
 
         if key == 'q':
             print("Bye!")
             break
 
-        elif key == 'u':
-            if undo_stack:
-                redo_stack.append((copy.deepcopy(board), score))
-                board, score = undo_stack.pop()
-            continue
-
-        elif key == 'r':
-            if redo_stack:
-                undo_stack.append((copy.deepcopy(board), score))
-                board, score = redo_stack.pop()
+        elif key in ('u', 'r', '[', ']', 'g'):
+            if key == 'u':
+                target = pos - 1
+            elif key == 'r':
+                target = pos + 1
+            elif key == '[':
+                target = max(pos - SCRUB_STEP, 0)
+            elif key == ']':
+                target = min(pos + SCRUB_STEP, len(history))
+            else:
+                target = read_move_number(len(history))
+            if target is not None and 0 <= target <= len(history) and target != pos:
+                board, score = seek(target)
+                pos = target
             continue
 
         elif key in ('h', 'j', 'k', 'l'):
             direction_map = {
-                'h': move_left,
-                'l': move_right,
-                'k': move_up,
-                'j': move_down
+                'h': (move_left, bb.LEFT),
+                'l': (move_right, bb.RIGHT),
+                'k': (move_up, bb.UP),
+                'j': (move_down, bb.DOWN)
             }
-            move_func = direction_map[key]
+            move_func, d = direction_map[key]
 
             new_board, moved, gained = move_func(board)
             if moved:
-                # 保存前にコピーしてUndoスタックに入れる
-                undo_stack.append((copy.deepcopy(board), score))
+                history.truncate(pos)  # 途中から打ったら先の手は捨てる（Redo不可）
+                before_spawn = bb.pack(new_board)
                 board = new_board
                 score += gained
                 add_random_tile(board)
-                redo_stack.clear()  # 移動後はRedo不可
+                history.record(d, before_spawn, bb.pack(board), gained)
+                pos += 1
             else:
                 continue  # 無効な移動なら再描画だけ
 
@@ -156,7 +178,7 @@ def main():
             continue  # 無効キーは無視
 
         if not can_move(board):
-            print_board(board, score)
+            print_board(board, score, pos, len(history))
             print("Game Over!")
             break
 
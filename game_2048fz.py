@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 差分ファジング（基準実装 vs 高速エンジン）
+Python 3.8+ で動作
+
+- 基準は game_2048.py の compress / merge / move_*（1 タイル 1 回のマージ規則）
+  game_2048.py はスコアを返さないので、同じ手順にスコアを足しただけの
+  game_2048e.py の move_* でスコアを取り、盤面と moved が game_2048.py と一致することも確かめる
+- 対象は game_2048bb.move（パック盤面）、game_2048bd.Board.move、game_2048g.move_events
+- ランダム盤面に加えて、端のケース（埋まった行、2,2,4,8 のような連鎖、最大指数）を混ぜる
+- 食い違ったら、マスを消す・指数を下げるを繰り返して最小の盤面に縮めてから報告する
+- エンジンは 4bit の指数までなので、基準の結果が 2**MAX_EXP を超える盤面は対象外として数える
+
+  python game_2048fz.py --boards 200000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import game_2048 as ref
+import game_2048e as ref_score
+import game_2048bb as bb
+import game_2048g as g
+from game_2048bd import Board
+
+SIZE = 4
+LIMIT = 1 << bb.MAX_EXP
+
+REF_MOVES = {
+    bb.UP: (ref.move_up, ref_score.move_up),
+    bb.DOWN: (ref.move_down, ref_score.move_down),
+    bb.LEFT: (ref.move_left, ref_score.move_left),
+    bb.RIGHT: (ref.move_right, ref_score.move_right),
+}
+
+# ---------- 基準と対象 ----------
+def reference(board: list, d: int) -> tuple:
+    """Returns: (new_board, moved, gained)"""
+    plain, with_score = REF_MOVES[d]
+    nb, moved = plain(board)
+    sb, smoved, gained = with_score(board)
+    if (sb, smoved) != (nb, moved):
+        raise AssertionError(f"game_2048e disagrees with game_2048 on {board} {d}")
+    return nb, moved, gained
+
+def _packed(board: list, d: int) -> tuple:
+    nb, moved, gained = bb.move(bb.pack(board), d)
+    return bb.unpack(nb), moved, gained
+
+def _board(board: list, d: int) -> tuple:
+    x = Board.from_list(board)
+    moved, gained = x.move(d)
+    return x.to_list(), moved, gained
+
+def _events(board: list, d: int) -> tuple:
+    nb, moved, gained, _ = g.move_events(board, bb.DIRECTIONS[d])
+    return nb, moved, gained
+
+ENGINES = {'bb': _packed, 'board': _board, 'events': _events}
+
+def in_domain(result: tuple) -> bool:
+    return all(v <= LIMIT for row in result[0] for v in row)
+
+def check(board: list, d: int, engines: tuple, want: tuple = None):
+    """食い違いがあれば (エンジン名, 基準の結果, エンジンの結果)、なければ None"""
+    if want is None:
+        want = reference(board, d)
+    if not in_domain(want):
+        return None
+    for name in engines:
+        got = ENGINES[name](board, d)
+        # 動かないときのスコアは見ない（基準は 0、エンジンによっては計算しない）
+        if got[:2] != want[:2] or (want[1] and got[2] != want[2]):
+            return name, want, got
+    return None
+
+# ---------- 盤面の生成 ----------
+def _value(e: int) -> int:
+    return 1 << e if e else 0
+
+def edge_rows() -> list:
+    """端のケースになる行"""
+    rows = [[0, 0, 0, 0], [2, 2, 2, 2], [2, 2, 4, 8], [8, 4, 2, 2], [4, 4, 8, 8],
+            [2, 0, 2, 0], [0, 2, 0, 2], [2, 2, 0, 4], [4, 0, 4, 4], [2, 4, 2, 4],
+            [2, 4, 8, 16], [16, 8, 4, 2], [0, 0, 0, 2], [2, 0, 0, 0]]
+    top = [_value(e) for e in range(bb.MAX_EXP, bb.MAX_EXP - 4, -1)]
+    rows += [top, top[::-1], [LIMIT, LIMIT, 0, 0], [LIMIT // 2, LIMIT // 2, LIMIT, 0],
+             [LIMIT, 0, LIMIT // 2, LIMIT // 2]]
+    return rows
+
+EDGE_ROWS = edge_rows()
+
+def random_board(rng) -> list:
+    kind = rng.random()
+    if kind < 0.3:
+        # 端のケースの行を組み合わせ、半分は転置して列にする
+        board = [list(rng.choice(EDGE_ROWS)) for _ in range(SIZE)]
+        return ref.transpose(board) if rng.random() < 0.5 else board
+    if kind < 0.5:
+        # 小さい指数だけ（マージと連鎖が起きやすい）
+        return [[_value(rng.choice((0, 0, 1, 1, 2, 3))) for _ in range(SIZE)]
+                for _ in range(SIZE)]
+    if kind < 0.6:
+        # 全マス埋まり
+        return [[_value(rng.randint(1, bb.MAX_EXP)) for _ in range(SIZE)]
+                for _ in range(SIZE)]
+    return [[_value(rng.randint(0, bb.MAX_EXP) if rng.random() < 0.7 else 0)
+             for _ in range(SIZE)] for _ in range(SIZE)]
+
+# ---------- 縮小 ----------
+def shrink(board: list, d: int, engines: tuple) -> list:
+    """食い違いが残る限り、マスを消す・指数を 1 下げるを繰り返す"""
+    board = [row[:] for row in board]
+    changed = True
+    while changed:
+        changed = False
+        for r in range(SIZE):
+            for c in range(SIZE):
+                v = board[r][c]
+                for smaller in (0, v // 2 if v > 2 else 0):
+                    if smaller == v:
+                        continue
+                    board[r][c] = smaller
+                    if check(board, d, engines) is not None:
+                        changed = True
+                        v = smaller
+                        break
+                    board[r][c] = v
+    return board
+
+# ---------- 実行 ----------
+def fuzz(task: tuple) -> dict:
+    """task: (seed, 盤面数, エンジン名) を 1 かたまり調べる"""
+    seed, n, engines = task
+    rng = random.Random(seed)
+    result = {'cases': 0, 'skipped': 0, 'failure': None}
+    for _ in range(n):
+        board = random_board(rng)
+        for d in range(4):
+            want = reference(board, d)
+            if not in_domain(want):
+                result['skipped'] += 1
+                continue
+            result['cases'] += 1
+            if check(board, d, engines, want) is not None:
+                small = shrink(board, d, engines)
+                name, want, got = check(small, d, engines)
+                result['failure'] = {'seed': seed, 'engine': name, 'board': small,
+                                     'direction': bb.DIRECTIONS[d],
+                                     'expected': want, 'got': got}
+                return result
+    return result
+
+def run(boards: int, seed: int, engines: tuple, workers: int, chunk: int = 2000):
+    tasks = [(seed * 1000003 + i, min(chunk, boards - i * chunk), engines)
+             for i in range((boards + chunk - 1) // chunk)]
+    if workers <= 1:
+        yield from map(fuzz, tasks)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(fuzz, tasks)
+
+def _show(board: list) -> str:
+    return "\n".join("  " + " ".join(f"{v:6d}" for v in row) for row in board)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Differential fuzzer: reference vs fast engines")
+    ap.add_argument('--boards', type=int, default=100000)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--engines', default=','.join(ENGINES),
+                    help="comma-separated subset of " + ", ".join(ENGINES))
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+    engines = tuple(e for e in args.engines.split(',') if e)
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        ap.error(f"unknown engine: {', '.join(unknown)}")
+
+    cases = skipped = 0
+    t0 = time.perf_counter()
+    for r in run(args.boards, args.seed, engines, args.workers):
+        cases += r['cases']
+        skipped += r['skipped']
+        f = r['failure']
+        if f is not None:
+            print(f"MISMATCH in {f['engine']} (chunk seed {f['seed']}), "
+                  f"direction {f['direction']}, minimal board:\n{_show(f['board'])}")
+            print(f"expected moved={f['expected'][1]} gained={f['expected'][2]}:\n"
+                  f"{_show(f['expected'][0])}")
+            print(f"got moved={f['got'][1]} gained={f['got'][2]}:\n{_show(f['got'][0])}")
+            return 1
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    print(f"{cases} board x direction cases agree across {', '.join(engines)} "
+          f"({skipped} skipped beyond {LIMIT}) in {elapsed:.2f}s "
+          f"({cases / elapsed:.0f} cases/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
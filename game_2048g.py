@@ -5,11 +5,15 @@
 Author: ChatGPT
 """
 
+import collections
 import curses
 import random
 import sys
 import time
 
+import game_2048ai as ai
+import game_2048bb as bb
+
 # ----------------------------------------
 # 盤面（4x4）の操作
 # ----------------------------------------
@@ -38,25 +42,29 @@ def compress(row):
     return new_row
 
 def merge(row):
-    """左に詰めた行で隣り合う同じ数字をマージ"""
+    """左に詰めた行で隣り合う同じ数字をマージ（合体した値の和も返す）"""
+    score = 0
     for i in range(SIZE - 1):
         if row[i] != 0 and row[i] == row[i + 1]:
             row[i] *= 2
+            score += row[i]
             row[i + 1] = 0
-    return row
+    return row, score
 
 def move_left(board):
     """左移動"""
     moved = False
+    gained = 0
     new_board = []
     for row in board:
         compressed = compress(row)
-        merged = merge(compressed)
+        merged, score = merge(compressed)
         final = compress(merged)
         if final != row:
             moved = True
         new_board.append(final)
-    return new_board, moved
+        gained += score
+    return new_board, moved, gained
 
 def transpose(board):
     """行↔列"""
@@ -69,25 +77,100 @@ def reverse(board):
 def move(board, direction):
     """
     direction: 'up', 'down', 'left', 'right'
-    Returns: (new_board, moved_bool)
+    Returns: (new_board, moved_bool, gained)
     """
     if direction == 'left':
         return move_left(board)
     elif direction == 'right':
         rev = reverse(board)
-        moved_board, moved = move_left(rev)
-        return reverse(moved_board), moved
+        moved_board, moved, gained = move_left(rev)
+        return reverse(moved_board), moved, gained
     elif direction == 'up':
         trans = transpose(board)
-        moved_board, moved = move_left(trans)
-        return transpose(moved_board), moved
+        moved_board, moved, gained = move_left(trans)
+        return transpose(moved_board), moved, gained
     elif direction == 'down':
         trans = transpose(board)
         rev = reverse(trans)
-        moved_board, moved = move_left(rev)
-        return transpose(reverse(moved_board)), moved
+        moved_board, moved, gained = move_left(rev)
+        return transpose(reverse(moved_board)), moved, gained
     else:
-        return board, False
+        return board, False, 0
+
+# ----------------------------------------
+# イベント付きの移動（アニメーション・統計用）
+# ----------------------------------------
+def slide_events(line):
+    """
+    1 列を先頭方向に詰めてマージし、動いたタイルを記録する
+    Returns: (new_line, score, events)
+    events: [src_index, dst_index, merged_bool, new_value] のリスト
+    """
+    out = [0] * SIZE
+    events = []
+    score = 0
+    dst = -1
+    last_src = -1
+    last_event = None   # dst にいるタイルのイベント（動いていなければ None）
+    mergeable = False
+    for src, v in enumerate(line):
+        if v == 0:
+            continue
+        if mergeable and out[dst] == v:
+            out[dst] = v * 2
+            score += v * 2
+            mergeable = False
+            if last_event is None:
+                events.append([last_src, dst, True, v * 2])
+            else:
+                last_event[2] = True
+                last_event[3] = v * 2
+            events.append([src, dst, True, v * 2])
+        else:
+            dst += 1
+            out[dst] = v
+            mergeable = True
+            last_src = src
+            last_event = None
+            if src != dst:
+                last_event = [src, dst, False, v]
+                events.append(last_event)
+    return out, score, events
+
+def _line_cells(direction, k):
+    """direction に詰めるときの k 本目の列を、先頭側から並べたマス座標"""
+    if direction == 'left':
+        return [(k, i) for i in range(SIZE)]
+    if direction == 'right':
+        return [(k, SIZE - 1 - i) for i in range(SIZE)]
+    if direction == 'up':
+        return [(i, k) for i in range(SIZE)]
+    return [(SIZE - 1 - i, k) for i in range(SIZE)]
+
+LINE_CELLS = {d: [_line_cells(d, k) for k in range(SIZE)]
+              for d in ('up', 'down', 'left', 'right')}
+
+def move_events(board, direction):
+    """
+    move() と同じ結果に、タイルごとのイベントを付けて返す
+    （通常の move() は遅くならないよう別関数にしている）
+    Returns: (new_board, moved_bool, gained, events)
+    events: (src_r, src_c, dst_r, dst_c, merged_bool, new_value) のリスト
+    """
+    if direction not in LINE_CELLS:
+        return board, False, 0, []
+    new_board = [[0] * SIZE for _ in range(SIZE)]
+    gained = 0
+    events = []
+    for cells in LINE_CELLS[direction]:
+        line = [board[r][c] for r, c in cells]
+        out, score, evs = slide_events(line)
+        gained += score
+        for (r, c), v in zip(cells, out):
+            new_board[r][c] = v
+        for src, dst, merged, value in evs:
+            events.append(cells[src] + cells[dst] + (merged, value))
+    return new_board, bool(events), gained, events
 
 def won(board):
     """2048 が出たら True"""
@@ -109,8 +192,45 @@ def lost(board):
 # ----------------------------------------
 # 描画
 # ----------------------------------------
-def draw_board(stdscr, board, score, best):
-    stdscr.clear()
+ANIM_FPS = 60    # スライドアニメーションの目標フレームレート
+ANIM_TIME = 0.1  # スライド 1 回の長さ（秒）
+
+CELL_WIDTH = 6
+BOARD_Y = 3
+
+def hint_text(result):
+    """HintEngine の結果を表示用の文字列に"""
+    if result is None:
+        return "Hint: thinking..."
+    depth, d, value = result
+    if d is None:
+        return "Hint: no moves"
+    return f"Hint: {bb.DIRECTIONS[d].upper()}  (EV {value:.0f}, depth {depth})"
+
+def tile_color(val):
+    """背景色を値に応じて変える（簡易的に）"""
+    if val == 0:
+        return curses.color_pair(0)
+    elif val <= 4:
+        return curses.color_pair(1)
+    elif val <= 16:
+        return curses.color_pair(2)
+    elif val <= 64:
+        return curses.color_pair(3)
+    elif val <= 256:
+        return curses.color_pair(4)
+    elif val <= 1024:
+        return curses.color_pair(5)
+    else:
+        return curses.color_pair(6)
+
+def draw_tile(stdscr, y, x, val):
+    text = " ".center(CELL_WIDTH) if val == 0 else str(val).center(CELL_WIDTH)
+    stdscr.addstr(y, x, text, tile_color(val) | curses.A_BOLD)
+
+def draw_board(stdscr, board, score, best, hint=None, status=None):
+    # clear() だと毎回端末全体を描き直すので erase() で差分だけ送る
+    stdscr.erase()
     h, w = stdscr.getmaxyx()
     title = "2048 (Python Terminal)"
     stdscr.addstr(0, (w - len(title)) // 2, title, curses.A_BOLD)
@@ -120,42 +240,63 @@ def draw_board(stdscr, board, score, best):
     stdscr.addstr(1, (w - len(score_str)) // 2, score_str)
 
     # ボード描画
-    cell_width = 6
-    start_y = 3
-    start_x = (w - cell_width * SIZE) // 2
+    start_y = BOARD_Y
+    start_x = (w - CELL_WIDTH * SIZE) // 2
 
     for r in range(SIZE):
         for c in range(SIZE):
-            val = board[r][c]
-            if val == 0:
-                text = " ".center(cell_width)
-            else:
-                text = str(val).center(cell_width)
-            y = start_y + r * 2
-            x = start_x + c * cell_width
-            # 背景色を値に応じて変える（簡易的に）
-            if val == 0:
-                color = curses.color_pair(0)
-            elif val <= 4:
-                color = curses.color_pair(1)
-            elif val <= 16:
-                color = curses.color_pair(2)
-            elif val <= 64:
-                color = curses.color_pair(3)
-            elif val <= 256:
-                color = curses.color_pair(4)
-            elif val <= 1024:
-                color = curses.color_pair(5)
-            else:
-                color = curses.color_pair(6)
-
-            stdscr.addstr(y, x, text, color | curses.A_BOLD)
+            draw_tile(stdscr, start_y + r * 2, start_x + c * CELL_WIDTH, board[r][c])
 
     # ガイド
-    help_str = "Use arrow keys or WASD. R = restart, Q = quit."
+    help_str = "Use arrow keys or WASD. I = hint, P = autoplay, R = restart, Q = quit."
     stdscr.addstr(start_y + SIZE * 2 + 1, (w - len(help_str)) // 2, help_str, curses.A_DIM)
+
+    if hint is not None:
+        stdscr.addstr(start_y + SIZE * 2 + 2, (w - len(hint)) // 2, hint)
+    if status is not None:
+        stdscr.addstr(start_y + SIZE * 2 + 3, (w - len(status)) // 2, status)
+    stdscr.refresh()
+
+def draw_anim_frame(stdscr, old_board, events, t):
+    """
+    スライド途中（t = 0..1）の 1 フレーム
+    イベントのあった行の範囲だけを消して描き直す
+    """
+    h, w = stdscr.getmaxyx()
+    start_x = (w - CELL_WIDTH * SIZE) // 2
+    moving = set()
+    lo, hi = SIZE, -1
+    for sr, sc, dr, dc, _, _ in events:
+        moving.add((sr, sc))
+        lo = min(lo, sr, dr)
+        hi = max(hi, sr, dr)
+
+    blank = " " * (CELL_WIDTH * SIZE)
+    for y in range(BOARD_Y + lo * 2, BOARD_Y + hi * 2 + 1):
+        stdscr.addstr(y, start_x, blank)
+    for r in range(lo, hi + 1):
+        for c in range(SIZE):
+            if old_board[r][c] and (r, c) not in moving:
+                draw_tile(stdscr, BOARD_Y + r * 2, start_x + c * CELL_WIDTH, old_board[r][c])
+    for sr, sc, dr, dc, merged, value in events:
+        y = BOARD_Y + round((sr + (dr - sr) * t) * 2)
+        x = start_x + round((sc + (dc - sc) * t) * CELL_WIDTH)
+        draw_tile(stdscr, y, x, value // 2 if merged else value)
     stdscr.refresh()
 
+def percentile(sorted_xs, q):
+    if not sorted_xs:
+        return 0.0
+    return sorted_xs[min(len(sorted_xs) - 1, int(q * len(sorted_xs)))]
+
+def anim_report(stats):
+    """計測モードの結果（フレーム数、落ちたフレーム、描画時間の分布）"""
+    times = sorted(stats['frame_times'])
+    ms = [percentile(times, q) * 1000 for q in (0.5, 0.95, 0.99)]
+    return (f"anim: {stats['animations']} slides {len(times)} frames "
+            f"{stats['dropped']} dropped  p50 {ms[0]:.2f} p95 {ms[1]:.2f} "
+            f"p99 {ms[2]:.2f} ms")
+
 # ----------------------------------------
 # Curses 初期化
 # ----------------------------------------
@@ -173,7 +314,30 @@ def init_colors():
 # ----------------------------------------
 # メインループ
 # ----------------------------------------
-def main(stdscr):
+AUTO_FPS = 30    # 自動プレイ中の描画上限
+AUTO_DEPTH = 2   # 自動プレイの探索深さ
+
+def autoplay_frame(board, budget, depth):
+    """
+    budget 秒のあいだ AI に高速エンジン上で打たせ続ける（途中の盤面は描画しない）
+    Returns: (new_board, moves, gained, alive_bool)
+    """
+    b = bb.pack(board)
+    moves = 0
+    total = 0
+    deadline = time.perf_counter() + budget
+    while True:
+        d, _ = ai.best_move(b, depth)
+        if d is None:
+            return bb.unpack(b), moves, total, False
+        b, _, gained = bb.move(b, d)
+        b = bb.add_random_tile(b)
+        moves += 1
+        total += gained
+        if time.perf_counter() >= deadline:
+            return bb.unpack(b), moves, total, True
+
+def main(stdscr, measure=False):
     curses.curs_set(0)
     stdscr.nodelay(True)   # 非ブロッキング入力
     stdscr.keypad(True)    # キーコード取得
@@ -182,22 +346,76 @@ def main(stdscr):
     board = new_game()
     score = 0
     best = 0
+    hints = ai.HintEngine()
+    show_hint = False
+    autoplay = False
+    auto_moves = 0
+    auto_start = 0.0
+    anim = None                     # (元の盤面, イベント, 開始時刻)
+    next_frame = 0.0
+    pending = collections.deque()   # アニメーション中に押されたキー
+    stats = {'animations': 0, 'frame_times': [], 'dropped': 0}
 
     while True:
-        draw_board(stdscr, board, score, best)
+        # ---- アニメーション（入力は止めない） ----
+        if anim is not None:
+            try:
+                key = stdscr.getch()
+            except KeyboardInterrupt:
+                break
+            now = time.perf_counter()
+            t = (now - anim[2]) / ANIM_TIME
+            if key != -1:
+                pending.append(key)   # 早送りして、次の手として処理する
+                t = 1.0
+            if t < 1.0:
+                if now >= next_frame:
+                    late = int((now - next_frame) * ANIM_FPS)
+                    stats['dropped'] += late
+                    draw_anim_frame(stdscr, anim[0], anim[1], t)
+                    stats['frame_times'].append(time.perf_counter() - now)
+                    next_frame += (late + 1) / ANIM_FPS
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
+                continue
+            anim = None
+
+        status = None
+        if autoplay:
+            # 1 フレーム分だけエンジンを回し、途中の盤面は捨てる
+            board, n, gained, alive = autoplay_frame(board, 1.0 / AUTO_FPS, AUTO_DEPTH)
+            auto_moves += n
+            autoplay = alive
+            score += gained
+            if score > best:
+                best = score
+            elapsed = max(time.perf_counter() - auto_start, 1e-9)
+            status = (f"Auto: {auto_moves} moves  {auto_moves / elapsed:.0f} moves/s"
+                      f"  max {max(max(row) for row in board)}")
+        elif measure:
+            status = anim_report(stats)
+
+        if show_hint and not autoplay:
+            hints.request(bb.pack(board))
+            draw_board(stdscr, board, score, best, hint_text(hints.result()), status)
+        else:
+            draw_board(stdscr, board, score, best, status=status)
 
         if won(board):
             stdscr.addstr(2, 0, "You won! Press 'r' to restart or 'q' to quit.", curses.A_BLINK)
         elif lost(board):
             stdscr.addstr(2, 0, "Game Over! Press 'r' to restart or 'q' to quit.", curses.A_BLINK)
 
-        try:
-            key = stdscr.getch()
-        except KeyboardInterrupt:
-            break  # Ctrl-C で終了
+        if pending:
+            key = pending.popleft()
+        else:
+            try:
+                key = stdscr.getch()
+            except KeyboardInterrupt:
+                break  # Ctrl-C で終了
 
         if key == -1:
-            time.sleep(0.05)
+            if not autoplay:
+                time.sleep(0.05)
             continue
 
         direction = None
@@ -211,32 +429,58 @@ def main(stdscr):
             direction = 'down'
         elif key in (ord('q'), ord('Q')):
             break
+        elif key in (ord('i'), ord('I')):
+            show_hint = not show_hint
+            if not show_hint:
+                hints.cancel()
+            continue
+        elif key in (ord('p'), ord('P')):
+            autoplay = not autoplay
+            if autoplay:
+                # ヒントの探索スレッドは止める（同じキャッシュを書き、GIL も取り合う）
+                hints.cancel()
+            auto_moves = 0
+            auto_start = time.perf_counter()
+            continue
         elif key in (ord('r'), ord('R')):
             board = new_game()
             score = 0
             continue
 
+        if autoplay:
+            continue
+
         if direction:
-            new_board, moved = move(board, direction)
+            new_board, moved, gained, events = move_events(board, direction)
             if moved:
+                anim = (board, events, time.perf_counter())
+                next_frame = anim[2]
+                stats['animations'] += 1
                 board = new_board
                 add_random_tile(board)
-                # スコアは合体したセルの和
-                score = sum(cell for row in board for cell in row if cell > 0)
+                # スコアは合体で生まれたタイルの値の和（移動ごとに加算）
+                score += gained
                 if score > best:
                     best = score
 
+    hints.cancel()
+
     # 退避メッセージ
     stdscr.nodelay(False)
     stdscr.addstr(SIZE * 2 + 6, 0, "Thanks for playing! Press any key to exit.")
     stdscr.getch()
+    return stats
 
 # ----------------------------------------
 # エントリポイント
 # ----------------------------------------
 if __name__ == "__main__":
+    # --measure: 終了時にアニメーションのフレーム統計を表示
+    measure = '--measure' in sys.argv[1:]
     try:
-        curses.wrapper(main)
+        stats = curses.wrapper(main, measure)
+        if measure:
+            print(anim_report(stats))
     except curses.error:
         print("Curses error: Make sure your terminal supports colors.")
         sys.exit(1)
@@ -10,6 +10,9 @@ import random
 import sys
 import time
 
+import game_2048ai as ai
+import game_2048bb as bb
+
 # ------------------------------
 # 盤面（4x4）の操作
 # ------------------------------
@@ -35,23 +38,27 @@ def compress(row):
     return new_row
 
 def merge(row):
+    score = 0
     for i in range(SIZE - 1):
         if row[i] != 0 and row[i] == row[i + 1]:
             row[i] *= 2
+            score += row[i]
             row[i + 1] = 0
-    return row
+    return row, score
 
 def move_left(board):
     moved = False
+    gained = 0
     new_board = []
     for row in board:
         compressed = compress(row)
-        merged = merge(compressed)
+        merged, score = merge(compressed)
         final = compress(merged)
         if final != row:
             moved = True
         new_board.append(final)
-    return new_board, moved
+        gained += score
+    return new_board, moved, gained
 
 def transpose(board):
     return [list(row) for row in zip(*board)]
@@ -64,19 +71,19 @@ def move(board, direction):
         return move_left(board)
     elif direction == 'right':
         rev = reverse(board)
-        moved_board, moved = move_left(rev)
-        return reverse(moved_board), moved
+        moved_board, moved, gained = move_left(rev)
+        return reverse(moved_board), moved, gained
     elif direction == 'up':
         trans = transpose(board)
-        moved_board, moved = move_left(trans)
-        return transpose(moved_board), moved
+        moved_board, moved, gained = move_left(trans)
+        return transpose(moved_board), moved, gained
     elif direction == 'down':
         trans = transpose(board)
         rev = reverse(trans)
-        moved_board, moved = move_left(rev)
-        return transpose(reverse(moved_board)), moved
+        moved_board, moved, gained = move_left(rev)
+        return transpose(reverse(moved_board)), moved, gained
     else:
-        return board, False
+        return board, False, 0
 
 def won(board):
     return any(2048 in row for row in board)
@@ -95,7 +102,15 @@ def lost(board):
 # ------------------------------
 # 描画
 # ------------------------------
-def draw_board(stdscr, board, score, best):
+def hint_text(result):
+    if result is None:
+        return "Hint: thinking..."
+    depth, d, value = result
+    if d is None:
+        return "Hint: no moves"
+    return f"Hint: {bb.DIRECTIONS[d].upper()}  (EV {value:.0f}, depth {depth})"
+
+def draw_board(stdscr, board, score, best, hint=None):
     stdscr.clear()
     h, w = stdscr.getmaxyx()
     title = "2048 (Python Terminal)"
@@ -134,8 +149,11 @@ def draw_board(stdscr, board, score, best):
 
             stdscr.addstr(y, x, text, color | curses.A_BOLD)
 
-    help_str = "Use arrow keys or HJKL. R = restart, Q = quit."
+    help_str = "Use arrow keys or HJKL. I = hint, R = restart, Q = quit."
     stdscr.addstr(start_y + SIZE * 2 + 1, (w - len(help_str)) // 2, help_str, curses.A_DIM)
+
+    if hint is not None:
+        stdscr.addstr(start_y + SIZE * 2 + 2, (w - len(hint)) // 2, hint)
     stdscr.refresh()
 
 # ------------------------------
@@ -163,9 +181,15 @@ def main(stdscr):
     board = new_game()
     score = 0
     best = 0
+    hints = ai.HintEngine()
+    show_hint = False
 
     while True:
-        draw_board(stdscr, board, score, best)
+        if show_hint:
+            hints.request(bb.pack(board))
+            draw_board(stdscr, board, score, best, hint_text(hints.result()))
+        else:
+            draw_board(stdscr, board, score, best)
 
         if won(board):
             stdscr.addstr(2, 0, "You won! Press 'r' to restart or 'q' to quit.", curses.A_BLINK)
@@ -192,20 +216,26 @@ def main(stdscr):
             direction = 'down'
         elif key in (ord('q'), ord('Q')):
             break
+        elif key in (ord('i'), ord('I')):
+            show_hint = not show_hint
+            if not show_hint:
+                hints.cancel()
+            continue
         elif key in (ord('r'), ord('R')):
             board = new_game()
             score = 0
             continue
 
         if direction:
-            new_board, moved = move(board, direction)
+            new_board, moved, gained = move(board, direction)
             if moved:
                 board = new_board
                 add_random_tile(board)
-                score = sum(cell for row in board for cell in row if cell > 0)
+                score += gained
                 if score > best:
                     best = score
 
+    hints.cancel()
     stdscr.nodelay(False)
     stdscr.addstr(SIZE * 2 + 6, 0, "Thanks for playing! Press any key to exit.")
     stdscr.getch()
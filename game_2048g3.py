@@ -5,14 +5,22 @@
 2048 1画面対戦型（プレイヤー ↔ コンピュータ）
 Python 3.8+ で動作
 
-- コンピュータは自動で動く
+- コンピュータは自動で動く（expectimax 探索。--mc ならモンテカルロのロールアウト）
+- プレイヤーの手番中はコンピュータが先読みする
 - ターン表示は一切出力しない
+- 入力・AI・描画は asyncio のタスクに分け、AI の探索中も入力を受け付ける
 """
 
+import asyncio
+import concurrent.futures
 import curses
 import random
 import sys
-import time
+import threading
+
+import game_2048ai as ai
+import game_2048bb as bb
+import game_2048mc as mc
 
 # ---------- 盤面（4x4）の操作 ----------
 SIZE = 4
@@ -36,24 +44,28 @@ def compress(row: list) -> list:
     non_zero += [0] * (SIZE - len(non_zero))
     return non_zero
 
-def merge(row: list) -> list:
+def merge(row: list) -> tuple:
+    score = 0
     for i in range(SIZE - 1):
         if row[i] != 0 and row[i] == row[i + 1]:
             row[i] *= 2
+            score += row[i]
             row[i + 1] = 0
-    return row
+    return row, score
 
 def move_left(board: list) -> tuple:
     moved = False
+    gained = 0
     new_board = []
     for row in board:
         c = compress(row)
-        m = merge(c)
+        m, score = merge(c)
         f = compress(m)
         if f != row:
             moved = True
         new_board.append(f)
-    return new_board, moved
+        gained += score
+    return new_board, moved, gained
 
 def transpose(board: list) -> list:
     return [list(row) for row in zip(*board)]
@@ -63,46 +75,79 @@ def reverse(board: list) -> list:
 
 def move(board: list, direction: str) -> tuple:
     if direction == 'left':
-        nb, mv = move_left(board)
+        nb, mv, gained = move_left(board)
     elif direction == 'right':
-        nb, mv = move_left(reverse(board))
+        nb, mv, gained = move_left(reverse(board))
         nb = reverse(nb)
     elif direction == 'up':
-        nb, mv = move_left(transpose(board))
+        nb, mv, gained = move_left(transpose(board))
         nb = transpose(nb)
     elif direction == 'down':
-        nb, mv = move_left(reverse(transpose(board)))
+        nb, mv, gained = move_left(reverse(transpose(board)))
         nb = transpose(reverse(nb))
     else:
         return board, False, 0
-
-    gained = sum(nb[i][j] for i in range(SIZE)
-                 for j in range(SIZE) if nb[i][j] > board[i][j])
     return nb, mv, gained
 
+DIRECTIONS = ('up', 'down', 'left', 'right')
+
+def legal_moves(board: list) -> int:
+    """
+    動ける方向を 4bit のマスクで返す（bit i が DIRECTIONS[i]）
+    盤面は作らず、隣り合う 2 マスを 1 回ずつ見るだけ
+    """
+    mask = 0
+    for r in range(SIZE):
+        row = board[r]
+        nxt = board[r + 1] if r + 1 < SIZE else None
+        for c in range(SIZE):
+            a = row[c]
+            if c + 1 < SIZE:
+                b = row[c + 1]
+                if a == b:
+                    if a:
+                        mask |= 0b1100
+                elif not a:
+                    mask |= 0b0100      # 左に詰められる
+                elif not b:
+                    mask |= 0b1000      # 右に詰められる
+            if nxt is not None:
+                b = nxt[c]
+                if a == b:
+                    if a:
+                        mask |= 0b0011
+                elif not a:
+                    mask |= 0b0001      # 上に詰められる
+                elif not b:
+                    mask |= 0b0010      # 下に詰められる
+            if mask == 0b1111:
+                return mask
+    return mask
+
 def won(board: list) -> bool:
     return any(2048 in row for row in board)
 
 def lost(board: list) -> bool:
-    if any(0 in row for row in board):
-        return False
-    for r in range(SIZE):
-        for c in range(SIZE):
-            if r + 1 < SIZE and board[r][c] == board[r + 1][c]:
-                return False
-            if c + 1 < SIZE and board[r][c] == board[r][c + 1]:
-                return False
-    return True
-
-# ---------- コンピュータ側の簡易 AI ----------
-def computer_choose_move(board: list) -> str | None:
-    moves = []
-    for d in ('up', 'down', 'left', 'right'):
-        _, mv, _ = move(board, d)
-        if mv:
-            moves.append(d)
+    return legal_moves(board) == 0
+
+# ---------- コンピュータ側の AI ----------
+COMPUTER_DEPTH = 2
+
+def computer_random_move(board: list) -> str | None:
+    mask = legal_moves(board)
+    moves = [d for i, d in enumerate(DIRECTIONS) if mask >> i & 1]
     return random.choice(moves) if moves else None
 
+def computer_choose_move(board: list, stop=None, use_mc: bool = False) -> str | None:
+    # 先読み済みならキャッシュから即座に（より深い）結果が返る
+    # stop（threading.Event）が立つと ai.Cancelled で打ち切る
+    # use_mc なら expectimax の代わりにモンテカルロのロールアウトで選ぶ
+    if use_mc:
+        d, _ = mc.best_move(bb.pack(board), stop=stop)
+    else:
+        d, _ = ai.best_move(bb.pack(board), COMPUTER_DEPTH, stop)
+    return bb.DIRECTIONS[d] if d is not None else None
+
 # ---------- 描画 ----------
 def draw_board(stdscr, board, score_p, score_c, turn):
     stdscr.clear()
@@ -153,75 +198,147 @@ def init_colors() -> None:
     curses.init_pair(5, curses.COLOR_RED, curses.COLOR_BLACK)
     curses.init_pair(6, curses.COLOR_GREEN, curses.COLOR_BLACK)
 
-# ---------- メインループ ----------
-def main(stdscr):
-    curses.curs_set(0)
-    stdscr.nodelay(True)
-    stdscr.keypad(True)
-    init_colors()
-
-    board = new_game()
-    score_p = score_c = 0
-    turn = 'player'            # ここを必ず小文字で管理
+# ---------- メインループ（asyncio） ----------
+KEY_DIRS = {
+    curses.KEY_LEFT: 'left', ord('h'): 'left', ord('H'): 'left',
+    curses.KEY_RIGHT: 'right', ord('l'): 'right', ord('L'): 'right',
+    curses.KEY_UP: 'up', ord('k'): 'up', ord('K'): 'up',
+    curses.KEY_DOWN: 'down', ord('j'): 'down', ord('J'): 'down',
+}
+
+class Versus:
+    """1 画面対戦の状態（ゲームタスクだけが書き換える）"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.board = new_game()
+        self.score_p = self.score_c = 0
+        self.turn = 'player'            # ここを必ず小文字で管理
+
+def render(stdscr, game: Versus) -> None:
+    draw_board(stdscr, game.board, game.score_p, game.score_c, game.turn)
+    if won(game.board):
+        stdscr.addstr(2, 0, "2048 で勝ちました！", curses.A_BLINK)
+    elif lost(game.board):
+        stdscr.addstr(2, 0, "Game Over!", curses.A_BLINK)
+    stdscr.refresh()
 
+async def render_task(stdscr, game: Versus, dirty: asyncio.Event) -> None:
+    """状態が変わったときだけ描き直す（連続した変更は 1 回にまとめる）"""
     while True:
-        draw_board(stdscr, board, score_p, score_c, turn)
-
-        if won(board):
-            stdscr.addstr(2, 0, "2048 で勝ちました！", curses.A_BLINK)
-        elif lost(board):
-            stdscr.addstr(2, 0, "Game Over!", curses.A_BLINK)
-
-        try:
+        await dirty.wait()
+        dirty.clear()
+        render(stdscr, game)
+
+async def computer_task(game: Versus, events: asyncio.Queue, executor,
+                        stop: threading.Event, use_mc: bool = False) -> None:
+    """探索はスレッドで行い、結果をイベントキューに返す"""
+    loop = asyncio.get_running_loop()
+    board = [row[:] for row in game.board]
+    try:
+        d = await loop.run_in_executor(executor, computer_choose_move,
+                                       board, stop, use_mc)
+    except ai.Cancelled:
+        return
+    await events.put(('computer', (stop, d)))
+
+async def run(stdscr, game: Versus, use_mc: bool = False) -> None:
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    dirty = asyncio.Event()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    ponderer = ai.Ponderer(0 if use_mc else ai.PONDER_DEPTH)   # ロールアウトは先読みを使わない
+    stop = threading.Event()
+
+    # 標準入力が読めるようになったら溜まっているキーを全部キューへ
+    def on_input() -> None:
+        while True:
             key = stdscr.getch()
-        except KeyboardInterrupt:
-            break
-
-        if key == -1:
-            time.sleep(0.05)
-            continue
-
-        # ==== プレイヤー入力 ====
-        if turn == 'player':
-            dir_ = None
-            if key in (curses.KEY_LEFT, ord('h'), ord('H')):
-                dir_ = 'left'
-            elif key in (curses.KEY_RIGHT, ord('l'), ord('L')):
-                dir_ = 'right'
-            elif key in (curses.KEY_UP,   ord('k'), ord('K')):
-                dir_ = 'up'
-            elif key in (curses.KEY_DOWN, ord('j'), ord('J')):
-                dir_ = 'down'
-            elif key in (ord('q'), ord('Q')):
+            if key == -1:
+                return
+            events.put_nowait(('key', key))
+
+    def cancel_computer() -> None:
+        stop.set()
+        if ai_task is not None:
+            ai_task.cancel()
+
+    fd = sys.stdin.fileno()
+    loop.add_reader(fd, on_input)
+    renderer = asyncio.create_task(render_task(stdscr, game, dirty))
+    ai_task = None
+    ponderer.start(bb.pack(game.board))
+    dirty.set()
+    try:
+        while True:
+            kind, value = await events.get()
+
+            if kind == 'computer':
+                # ==== コンピュータ側 ====
+                token, d = value
+                if token is not stop or game.turn != 'computer':
+                    continue                   # 再開前の古い結果
+                ai_task = None
+                if d:
+                    board, mv, gained = move(game.board, d)
+                    if mv:
+                        game.board = board
+                        game.score_c += gained
+                        add_random_tile(game.board)
+                game.turn = 'player'           # 自動でプレイヤーに戻る
+                ponderer.start(bb.pack(game.board))
+                dirty.set()
+                continue
+
+            # ==== プレイヤー入力 ====
+            if value in (ord('q'), ord('Q')):
                 break
-            elif key in (ord('r'), ord('R')):
-                board = new_game()
-                score_p = score_c = 0
-                turn = 'player'
+            if value in (ord('r'), ord('R')):
+                cancel_computer()
+                ai_task = None
+                game.reset()
+                ponderer.start(bb.pack(game.board))
+                dirty.set()
                 continue
 
-            if dir_:
-                board, mv, gained = move(board, dir_)
-                if mv:
-                    score_p += gained
-                    add_random_tile(board)
-                    turn = 'computer'   # 次はコンピュータ
-
-        # ==== コンピュータ側 ====
-        else:  # turn == 'computer'
-            time.sleep(0.2)
-            d = computer_choose_move(board)
-            if d:
-                board, mv, gained = move(board, d)
+            dir_ = KEY_DIRS.get(value)
+            if dir_ and game.turn == 'player':
+                board, mv, gained = move(game.board, dir_)
                 if mv:
-                    score_c += gained
-                    add_random_tile(board)
-            turn = 'player'           # 自動でプレイヤーに戻る
+                    ponderer.stop()
+                    game.board = board
+                    game.score_p += gained
+                    add_random_tile(game.board)
+                    game.turn = 'computer'     # 次はコンピュータ
+                    dirty.set()
+                    stop = threading.Event()
+                    ai_task = asyncio.create_task(
+                        computer_task(game, events, executor, stop, use_mc))
+    finally:
+        loop.remove_reader(fd)
+        cancel_computer()
+        ponderer.stop()
+        renderer.cancel()
+        executor.shutdown(wait=True)
+
+def main(stdscr, use_mc=False):
+    curses.curs_set(0)
+    stdscr.nodelay(True)
+    stdscr.keypad(True)
+    init_colors()
+
+    game = Versus()
+    try:
+        asyncio.run(run(stdscr, game, use_mc))
+    except KeyboardInterrupt:
+        pass
 
     # ==== 終了 ====
     stdscr.nodelay(False)
     stdscr.clear()
-    final_msg = f"Final Score – Player: {score_p} | Computer: {score_c}"
+    final_msg = f"Final Score – Player: {game.score_p} | Computer: {game.score_c}"
     stdscr.addstr(2, 0, final_msg, curses.A_BOLD)
     stdscr.addstr(4, 0, "Thanks for playing! Press any key to exit.")
     stdscr.refresh()
@@ -229,8 +346,10 @@ def main(stdscr):
 
 # ---------- エントリポイント ----------
 if __name__ == "__main__":
+    # --mc: コンピュータをモンテカルロのロールアウトで打たせる
+    use_mc = '--mc' in sys.argv[1:]
     try:
-        curses.wrapper(main)
+        curses.wrapper(main, use_mc)
     except curses.error:
         print("Curses error: 端末がカラーに対応していない可能性があります。")
         sys.exit(1)
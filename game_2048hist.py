@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 手順履歴（チェックポイント + 1 手 1 バイトの差分）
+Python 3.8+ で動作
+
+- 1 手は「方向 + 出現マス + 出現値」を 1 バイトで持つ
+- CHECKPOINT_INTERVAL 手ごとに盤面とスコアをまるごと持つ
+- seek(n) は直前のチェックポイントから打ち直すだけなので O(間隔)
+  打ち直した区間はまとめて覚えておき、同じ区間の Undo / Redo は O(1)
+
+- SpillStack は Undo / Redo 用のスタック。直近 SPILL_KEEP 件だけメモリに置き、
+  古い分は追記ファイルに逃がして、深い Undo のときに mmap で読み戻す
+
+  python game_2048hist.py --moves 100000
+  python game_2048hist.py --spill --moves 1000000
+"""
+
+import argparse
+import array
+import bisect
+import collections
+import mmap
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import game_2048bb as bb
+
+CHECKPOINT_INTERVAL = 64
+RESTART = 0xFF          # 新しいゲーム（次の位置に必ずチェックポイントがある）
+SPILL_KEEP = 256        # SpillStack がメモリに置く件数
+
+_SPILL = struct.Struct('<QQ')   # 盤面, スコア
+
+def encode_step(d: int, before_spawn: int, after: int) -> int:
+    """方向 2bit | 出現マス 4bit | 出現が 4 なら 1bit"""
+    x = after ^ before_spawn
+    cell = (x.bit_length() - 1) // 4
+    return d | cell << 2 | ((x >> (4 * cell)) - 1) << 6
+
+def apply_step(b: int, code: int) -> tuple:
+    """Returns: (new_board, gained)"""
+    nb, _, gained = bb.move(b, code & 3)
+    return nb | (((code >> 6) & 1) + 1) << (4 * ((code >> 2) & 0xF)), gained
+
+class History:
+    """
+    位置 p は「p 手打った後」の状態。位置 0 が初期盤面
+    record() で 1 手足し、seek(p) で任意の位置の (board, score) を返す
+    """
+
+    def __init__(self, board: int, score: int = 0,
+                 interval: int = CHECKPOINT_INTERVAL):
+        self.interval = interval
+        self.steps = bytearray()
+        self.cp_pos = array.array('Q', [0])
+        self.cp_board = array.array('Q', [board])
+        self.cp_score = array.array('Q', [score])
+        self._block_pos = None        # 覚えている区間の先頭位置
+        self._block = []              # その区間の (board, score)
+        self._last = (board, score)   # 末尾の状態
+        self._hash = bb.zobrist(board)  # 末尾の盤面の Zobrist ハッシュ
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def nbytes(self) -> int:
+        return (len(self.steps) + self.cp_pos.itemsize * len(self.cp_pos)
+                + self.cp_board.itemsize * len(self.cp_board)
+                + self.cp_score.itemsize * len(self.cp_score))
+
+    def _checkpoint(self, board: int, score: int) -> None:
+        self.cp_pos.append(len(self.steps))
+        self.cp_board.append(board)
+        self.cp_score.append(score)
+
+    def record(self, d: int, before_spawn: int, after: int, gained: int) -> None:
+        """末尾に 1 手足す（途中の位置から打つときは先に truncate する）"""
+        self.steps.append(encode_step(d, before_spawn, after))
+        self._hash = bb.zobrist_spawn(bb.zobrist_move(self._hash, self._last[0], d),
+                                      before_spawn, after)
+        self._last = (after, self._last[1] + gained)
+        if len(self.steps) - self.cp_pos[-1] >= self.interval:
+            self._checkpoint(*self._last)
+
+    def restart(self, board: int, score: int = 0) -> None:
+        self.steps.append(RESTART)
+        self._last = (board, score)
+        self._hash = bb.zobrist(board)
+        self._checkpoint(board, score)
+
+    def truncate(self, n: int) -> None:
+        """位置 n より後を捨てる（Undo 後に別の手を打ったとき）"""
+        if n >= len(self.steps):
+            return
+        state = self.seek(n)
+        del self.steps[n:]
+        k = bisect.bisect_right(self.cp_pos, n)
+        del self.cp_pos[k:]
+        del self.cp_board[k:]
+        del self.cp_score[k:]
+        self._last = state
+        self._hash = bb.zobrist(state[0])
+        if self._block_pos is not None and self._block_pos + len(self._block) > n + 1:
+            self._block_pos = None
+
+    def hash(self, n: int = None) -> int:
+        """位置 n（省略時は末尾）の盤面の Zobrist ハッシュ"""
+        if n is None or n == len(self.steps):
+            return self._hash
+        return bb.zobrist(self.seek(n)[0])
+
+    def seek(self, n: int) -> tuple:
+        """位置 n の (board, score)"""
+        if not 0 <= n <= len(self.steps):
+            raise IndexError(f"position {n} out of range 0..{len(self.steps)}")
+        if n == len(self.steps):
+            return self._last
+        block = self._block_pos
+        if block is not None and block <= n < block + len(self._block):
+            return self._block[n - block]
+        # 直前のチェックポイントから次のチェックポイントまで打ち直して覚える
+        k = bisect.bisect_right(self.cp_pos, n) - 1
+        start = self.cp_pos[k]
+        end = self.cp_pos[k + 1] if k + 1 < len(self.cp_pos) else len(self.steps)
+        b, score = self.cp_board[k], self.cp_score[k]
+        states = [(b, score)]
+        steps = self.steps
+        for i in range(start, end - 1):
+            b, gained = apply_step(b, steps[i])
+            score += gained
+            states.append((b, score))
+        self._block_pos = start
+        self._block = states
+        return states[n - start]
+
+# ---------- ディスクに逃がす Undo スタック ----------
+class SpillStack:
+    """
+    (パック盤面, スコア) のスタック。直近 keep 件だけメモリに置き、
+    それより古い分は追記ファイルへまとめて書き出す。
+    メモリの分を使い切るまで Undo したら、ファイルを mmap で読んで keep 件ずつ戻す
+    """
+
+    def __init__(self, keep: int = SPILL_KEEP, path: str = None):
+        self.keep = keep
+        self.recent = collections.deque()
+        self.file = open(path, 'w+b') if path else tempfile.TemporaryFile()
+        self.spilled = 0            # ファイル側の件数
+        self._map = None
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.recent)
+
+    def push(self, b: int, score: int) -> None:
+        self.recent.append((b, score))
+        if len(self.recent) >= 2 * self.keep:
+            self._spill(len(self.recent) - self.keep)
+
+    def pop(self) -> tuple:
+        if not self.recent:
+            if not self.spilled:
+                raise IndexError("pop from empty SpillStack")
+            self._refill()
+        return self.recent.pop()
+
+    def clear(self) -> None:
+        self.recent.clear()
+        self.spilled = 0            # 古い中身は次の書き出しで上書きされる
+
+    def _spill(self, n: int) -> None:
+        recent = self.recent
+        data = b''.join(_SPILL.pack(*recent.popleft()) for _ in range(n))
+        self.file.seek(self.spilled * _SPILL.size)
+        self.file.write(data)
+        self.spilled += n
+
+    def _refill(self) -> None:
+        """ファイルの末尾 keep 件をメモリに戻す"""
+        end = self.spilled * _SPILL.size
+        self.file.flush()
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        n = min(self.keep, self.spilled)
+        start = end - n * _SPILL.size
+        self.recent.extend(_SPILL.iter_unpack(self._map[start:end]))
+        self.spilled -= n
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self.file.close()
+
+# ---------- ベンチマーク ----------
+def build(moves: int, interval: int, seed: int = 0) -> History:
+    """ランダムに打つゲームをつなげて moves 手の履歴を作る"""
+    rng = random.Random(seed)
+    b = bb.new_game(rng)
+    hist = History(b, 0, interval)
+    while len(hist) < moves:
+        mask = bb.legal_moves(b)
+        if not mask:
+            b = bb.new_game(rng)
+            hist.restart(b)
+            continue
+        d = rng.choice([d for d in range(4) if mask >> d & 1])
+        nb, _, gained = bb.move(b, d)
+        b = bb.add_random_tile(nb, rng)
+        hist.record(d, nb, b, gained)
+    return hist
+
+def bench(moves: int, interval: int, seeks: int) -> str:
+    t0 = time.perf_counter()
+    hist = build(moves, interval)
+    t1 = time.perf_counter()
+    rng = random.Random(1)
+    lat = []
+    for _ in range(seeks):
+        n = rng.randrange(len(hist) + 1)
+        s = time.perf_counter()
+        hist.seek(n)
+        lat.append(time.perf_counter() - s)
+    lat.sort()
+    s = time.perf_counter()
+    for n in range(len(hist), -1, -1):      # 最後から最初まで 1 手ずつ Undo
+        hist.seek(n)
+    undo_all = time.perf_counter() - s
+    p50 = lat[len(lat) // 2] * 1e6
+    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1e6
+    return (f"{len(hist)} moves recorded in {t1 - t0:.2f}s, interval {interval}\n"
+            f"memory: {hist.nbytes()} bytes ({hist.nbytes() / len(hist):.2f} bytes/move; "
+            f"a deepcopy undo_stack entry alone is ~500 bytes)\n"
+            f"random seek: p50 {p50:.1f} us, p99 {p99:.1f} us over {seeks} seeks\n"
+            f"undo every move from the end: {undo_all:.2f}s "
+            f"({undo_all / (len(hist) + 1) * 1e6:.2f} us/move)")
+
+def bench_spill(moves: int, keep: int) -> str:
+    """moves 件積んでから全部 Undo する。メモリは積んでいる間だけ追跡する"""
+    rng = random.Random(0)
+    boards = [bb.new_game(rng) for _ in range(1024)]
+    stack = SpillStack(keep)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for i in range(moves):
+        stack.push(boards[i & 1023], i)
+    t1 = time.perf_counter()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    worst = 0.0
+    s = time.perf_counter()
+    for i in range(moves - 1, -1, -1):
+        p = time.perf_counter()
+        _, score = stack.pop()
+        worst = max(worst, time.perf_counter() - p)
+        if score != i:
+            raise AssertionError(f"popped score {score}, expected {i}")
+    t2 = time.perf_counter()
+    stack.close()
+    return (f"{moves} pushes in {t1 - t0:.2f}s, keep {keep}: "
+            f"{current} bytes in memory (peak {peak}), "
+            f"{moves * _SPILL.size} bytes on disk\n"
+            f"undo all: {t2 - s:.2f}s ({(t2 - s) / moves * 1e6:.2f} us/undo, "
+            f"worst {worst * 1e6:.0f} us)")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the checkpointed history")
+    ap.add_argument('--moves', type=int, default=100000)
+    ap.add_argument('--interval', type=int, default=CHECKPOINT_INTERVAL)
+    ap.add_argument('--seeks', type=int, default=10000)
+    ap.add_argument('--spill', action='store_true',
+                    help="benchmark SpillStack instead")
+    ap.add_argument('--keep', type=int, default=SPILL_KEEP)
+    args = ap.parse_args(argv)
+    if args.spill:
+        print(bench_spill(args.moves, args.keep))
+    else:
+        print(bench(args.moves, args.interval, args.seeks))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 モンテカルロ AI（ロールアウトの平均で手を選ぶ）
+Python 3.8+ で動作
+
+- 動ける方向ごとに K 本のロールアウト（詰むまで、または D 手まで）を打ち、
+  得点の平均がいちばん高い方向を選ぶ
+- ロールアウトは 1 本ずつではなく、全方向 × K 本をパック盤面のリストにして 1 手ずつ一斉に進める
+  （終わったものは外す。移動関数と乱数はループの外でローカル変数に引いておく）
+- ロールアウト中の手は random（動ける方向から一様）か greedy（その場の得点が最大、同点は乱数）
+- game_2048g3 のコンピュータ（--mc）と game_2048tour の方策（mc）から使える
+
+  python game_2048mc.py --rollouts 32 --depth 20 --policy random
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import game_2048ai as ai
+import game_2048bb as bb
+import game_2048rp as rp
+
+ROLLOUTS = 32         # 方向ごとのロールアウト数 K
+ROLLOUT_DEPTH = 20    # ロールアウトの手数 D（0 なら詰むまで）
+POLICIES = ('random', 'greedy')
+
+_ORDERS = [(a, b, c, d) for a in range(4) for b in range(4) for c in range(4)
+           for d in range(4) if len({a, b, c, d}) == 4]
+
+# 打ったロールアウトの本数と手数（速さの表示用）
+rollouts_done = 0
+rollout_moves = 0
+
+# ---------- ロールアウト ----------
+def rollout_scores(boards: list, depth: int = ROLLOUT_DEPTH, policy: str = 'random',
+                   rng=random, stop=None) -> list:
+    """
+    boards（移動直後・出現前の盤面）から一斉にロールアウトする
+    Returns: 各ロールアウトで得た点のリスト（boards と同じ順）
+    """
+    global rollouts_done, rollout_moves
+    if policy not in POLICIES:
+        raise ValueError(f"unknown rollout policy {policy!r}")
+    move = bb.move
+    shifts = range(0, 64, 4)
+    getrandbits = rng.getrandbits
+    greedy = policy == 'greedy'
+    boards = list(boards)
+    scores = [0] * len(boards)
+    live = list(range(len(boards)))
+    moves = 0
+    step = 0
+    while live and (not depth or step < depth):
+        if stop is not None and stop.is_set():
+            raise ai.Cancelled
+        still = []
+        for i in live:
+            # 出現
+            b = boards[i]
+            empty = [s for s in shifts if not b >> s & 0xF]
+            if not empty:
+                continue
+            z = getrandbits(48)     # 16bit ずつ: マス、2 か 4、方向を調べる順番
+            b |= (2 if (z >> 16 & 0xFFFF) % 10 == 0 else 1) << empty[(z & 0xFFFF) % len(empty)]
+            # 移動
+            best = None
+            gain = -1
+            for d in _ORDERS[(z >> 32) % 24]:
+                nb, moved, gained = move(b, d)
+                if moved and gained > gain:
+                    best, gain = nb, gained
+                    if not greedy:
+                        break
+            if best is None:
+                continue
+            boards[i] = best
+            scores[i] += gain
+            still.append(i)
+        moves += len(still)
+        live = still
+        step += 1
+    rollouts_done += len(boards)
+    rollout_moves += moves
+    return scores
+
+def rollout_values(b: int, rollouts: int = ROLLOUTS, depth: int = ROLLOUT_DEPTH,
+                   policy: str = 'random', rng=random, stop=None) -> dict:
+    """Returns: {方向: 平均得点（最初の移動の得点を含む）}。動けない方向は入らない"""
+    firsts = {}
+    for d in range(4):
+        nb, moved, gained = bb.move(b, d)
+        if moved:
+            firsts[d] = (nb, gained)
+    batch = [nb for nb, _ in firsts.values() for _ in range(rollouts)]
+    scores = rollout_scores(batch, depth, policy, rng, stop)
+    values = {}
+    for k, (d, (_, gained)) in enumerate(firsts.items()):
+        chunk = scores[k * rollouts:(k + 1) * rollouts]
+        values[d] = gained + sum(chunk) / rollouts
+    return values
+
+def best_move(b: int, rollouts: int = ROLLOUTS, depth: int = ROLLOUT_DEPTH,
+              policy: str = 'random', rng=random, stop=None) -> tuple:
+    """
+    ロールアウトの平均が最大の方向（ai.best_move と同じ形）
+    Returns: (direction_int or None, value)
+    """
+    values = rollout_values(b, rollouts, depth, policy, rng, stop)
+    if not values:
+        return None, 0.0
+    d = max(values, key=values.get)
+    return d, values[d]
+
+def mc_policy(rollouts: int = ROLLOUTS, depth: int = ROLLOUT_DEPTH,
+              policy: str = 'random', seed: int = 0):
+    """モンテカルロで打つ方策（board -> direction or None）。乱数は出現と別系統"""
+    rng = random.Random(seed)
+
+    def choose(b):
+        return best_move(b, rollouts, depth, policy, rng)[0]
+    return choose
+
+# ---------- ベンチマーク ----------
+def _rollout_one(b: int, depth: int, greedy: bool, rng) -> int:
+    """比較用: 1 本ずつ bb の関数で打つロールアウト"""
+    score = 0
+    step = 0
+    while not depth or step < depth:
+        b = bb.add_random_tile(b, rng)
+        mask = bb.legal_moves(b)
+        if not mask:
+            break
+        moves = [d for d in range(4) if mask >> d & 1]
+        if greedy:
+            rng.shuffle(moves)
+            d = max(moves, key=lambda d: bb.move(b, d)[2])
+        else:
+            d = rng.choice(moves)
+        b, _, gained = bb.move(b, d)
+        score += gained
+        step += 1
+    return score
+
+def bench_rollouts(rollouts: int, depth: int, policy: str, seed: int) -> str:
+    """同じ局面集で、一斉に進めるロールアウトと 1 本ずつのロールアウトの本数 / 秒を比べる"""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(8):
+        b = bb.new_game(rng)
+        for _ in range(rng.randrange(20, 200)):
+            d, _ = ai.best_move(b, 1)
+            if d is None:
+                break
+            b = bb.add_random_tile(bb.move(b, d)[0], rng)
+        boards.append(b)
+    ai.clear_cache()
+    afters = [bb.move(b, d)[0] for b in boards for d in range(4) if bb.move(b, d)[1]]
+    batch = [nb for nb in afters for _ in range(rollouts)]
+
+    t0 = time.perf_counter()
+    rollout_scores(batch, depth, policy, random.Random(seed))
+    t1 = time.perf_counter()
+    one_rng = random.Random(seed)
+    for nb in batch:
+        _rollout_one(nb, depth, policy == 'greedy', one_rng)
+    t2 = time.perf_counter()
+    batched = len(batch) / max(t1 - t0, 1e-9)
+    single = len(batch) / max(t2 - t1, 1e-9)
+    return (f"{len(batch)} rollouts: batched {batched:.0f} rollouts/s, "
+            f"one at a time {single:.0f} rollouts/s ({batched / single:.2f}x)")
+
+def bench(games: int, rollouts: int, depth: int, policy: str, seed: int,
+          max_moves: int) -> str:
+    global rollouts_done, rollout_moves
+    rollouts_done = rollout_moves = 0
+    scores = []
+    decisions = 0
+    t0 = time.perf_counter()
+    for i in range(games):
+        choose = mc_policy(rollouts, depth, policy, seed + i)
+        score = 0
+        for _, score, d in rp.play(seed + i, choose, max_moves):
+            if d is not None:
+                decisions += 1
+        scores.append(score)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    return (f"{games} games, K={rollouts}, D={depth or 'terminal'}, {policy}: "
+            f"mean score {sum(scores) / len(scores):.1f}, {decisions} moves in {elapsed:.2f}s "
+            f"({decisions / elapsed:.1f} moves/s, {rollouts_done / elapsed:.0f} rollouts/s, "
+            f"{rollout_moves / elapsed:.0f} rollout moves/s)")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Monte Carlo rollout move chooser")
+    ap.add_argument('--rollouts', type=int, default=ROLLOUTS, help="rollouts per direction")
+    ap.add_argument('--depth', type=int, default=ROLLOUT_DEPTH,
+                    help="rollout length in moves (0 = play to the end)")
+    ap.add_argument('--policy', choices=POLICIES, default='random')
+    ap.add_argument('--games', type=int, default=3)
+    ap.add_argument('--max-moves', type=int, default=0,
+                    help="stop each game after N moves (0 = play out)")
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args(argv)
+
+    print(bench_rollouts(args.rollouts, args.depth, args.policy, args.seed))
+    print(bench(args.games, args.rollouts, args.depth, args.policy, args.seed,
+                args.max_moves))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 性能の回帰チェック（決まった作業量を測ってベースラインと比べる）
+Python 3.8+ で動作
+
+- 作業は固定のシードで毎回同じ
+    random_games  ランダムに打つゲーム 400 局（パック盤面エンジン）
+    search        決まった局面集に対する深さ 3 の expectimax
+    row_moves     行テーブルでの行移動 100 万回
+- 時間は「較正ループ（純 Python の決まった計算）」の時間で割った値で比べるので、
+  速いマシンと遅いマシンの結果をそのまま比べられる
+  較正と作業を交互に測り、作業 / 前後の較正 の比の最小値をとる（邪魔が入った回は遅くなるだけなので、
+  最小値がいちばん揺れない。較正も 1 回ごとに CALIBRATE_RUNS 回測った最小値を使う）
+  作業 1 回は較正 1 回と同じくらい（0.1〜0.3 秒）にしておく。長い作業は必ずどこかで邪魔を拾うので、
+  短い較正の最小値と比べると比が実際より大きく揺れる
+- ベースライン（JSON）より threshold 以上遅くなった作業があれば終了コード 1
+
+  python game_2048pg.py                 # ベースラインと比べる
+  python game_2048pg.py --update        # 今の結果をベースラインにする
+  python game_2048pg.py --scale 0.1 --baseline quick.json   # 小さい作業量で別のベースライン
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import game_2048ai as ai
+import game_2048bb as bb
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'game_2048pg_baseline.json')
+THRESHOLD = 0.25     # 25% 遅くなったら失敗
+REPEAT = 5           # 最低この回数は測る
+MIN_TIME = 3.0       # 短い作業はこの秒数に達するまで繰り返す
+CALIBRATE_LOOPS = 1000000   # 較正 1 回 ≈ 0.2 秒（短いとタイマーとスケジューラの揺れが乗る）
+CALIBRATE_RUNS = 3          # 較正 1 回ぶんの値は、続けて測ったこの回数の最小値
+
+# ---------- 作業 ----------
+def _mix(x: int, i: int) -> int:
+    return (x * 31 + i) & 0xFFFFFFFF
+
+def calibrate() -> None:
+    """マシンの速さの物差し（エンジンのコードは使わない。関数呼び出し・int 演算・表引き）"""
+    table = list(range(4096))
+    d = {}
+    x = 0
+    for i in range(CALIBRATE_LOOPS):
+        x = _mix(x, i)
+        d[x & 0xFFF] = table[x >> 20]
+
+def random_games(scale: float) -> int:
+    rng = random.Random(2048)
+    moves = 0
+    for _ in range(max(1, int(400 * scale))):
+        b = bb.new_game(rng)
+        while True:
+            mask = bb.legal_moves(b)
+            if not mask:
+                break
+            d = rng.choice([d for d in range(4) if mask >> d & 1])
+            b = bb.add_random_tile(bb.move(b, d)[0], rng)
+            moves += 1
+    return moves
+
+def _positions(n: int) -> list:
+    """depth 1 の AI で打ち進めた途中局面（毎回同じ）"""
+    rng = random.Random(47)
+    out = []
+    while len(out) < n:
+        b = bb.new_game(rng)
+        for i in range(400):
+            d, _ = ai.best_move(b, 1)
+            if d is None:
+                break
+            b = bb.add_random_tile(bb.move(b, d)[0], rng)
+            if i % 40 == 39:
+                out.append(b)
+    ai.clear_cache()
+    return out[:n]
+
+_search_positions = []
+
+def search(scale: float) -> int:
+    if not _search_positions:
+        _search_positions.extend(_positions(20))
+    positions = _search_positions[:max(1, int(len(_search_positions) * scale))]
+    for b in positions:
+        ai.clear_cache()
+        ai.best_move(b, 3)
+    ai.clear_cache()
+    return len(positions)
+
+def row_moves(scale: float) -> int:
+    rng = random.Random(1)
+    rows = [rng.getrandbits(16) for _ in range(4096)]
+    left, right = bb.ROW_LEFT, bb.ROW_RIGHT
+    left_score = bb.ROW_LEFT_SCORE
+    n = max(1, int(1000000 * scale)) // 4096 + 1
+    total = 0
+    for _ in range(n):
+        for row in rows:
+            total += left[row] ^ right[row]
+            total += left_score[row]
+    return n * len(rows)
+
+WORKLOADS = {'random_games': random_games, 'search': search, 'row_moves': row_moves}
+
+# ---------- 計測 ----------
+def _timed(fn, *args) -> tuple:
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+def _calibration() -> float:
+    return min(_timed(calibrate)[0] for _ in range(CALIBRATE_RUNS))
+
+def run_workload(name: str, scale: float) -> dict:
+    """
+    較正と作業を交互に測り、作業 / 前後の較正の平均 の比の最小値をとる
+    （マシンが混んでいる時間帯は両方遅くなるので比にし、外からの邪魔は時間を延ばす方向にしか
+    働かないので、比の最小値は同じコードならほぼ同じ値になる）
+    """
+    ratios = []
+    best = None
+    units = 0
+    spent = 0.0
+    after = _calibration()
+    while len(ratios) < REPEAT or (spent < MIN_TIME and len(ratios) < 50):
+        before = after
+        seconds, units = _timed(WORKLOADS[name], scale)
+        after = _calibration()
+        ratios.append(seconds / ((before + after) / 2))
+        best = seconds if best is None else min(best, seconds)
+        spent += seconds
+    return {'seconds': best, 'units': units, 'normalized': min(ratios)}
+
+def measure(names: list, scale: float) -> dict:
+    """Returns: {作業名: {'seconds', 'units', 'normalized'}}"""
+    if 'search' in names and not _search_positions:
+        _search_positions.extend(_positions(20))    # 局面集の用意は測らない
+    return {name: run_workload(name, scale) for name in names}
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Returns: (作業名, 今, ベースライン, 変化率, 失敗か) のリスト"""
+    rows = []
+    for name, r in results.items():
+        base = baseline.get('workloads', {}).get(name)
+        if base is None:
+            rows.append((name, r['normalized'], None, None, False))
+            continue
+        change = r['normalized'] / base['normalized'] - 1
+        rows.append((name, r['normalized'], base['normalized'], change,
+                     change > threshold))
+    return rows
+
+def main(argv=None) -> int:
+    global REPEAT
+    ap = argparse.ArgumentParser(description="Performance regression gate")
+    ap.add_argument('--baseline', default=BASELINE)
+    ap.add_argument('--update', action='store_true', help="write the baseline")
+    ap.add_argument('--threshold', type=float, default=THRESHOLD,
+                    help="allowed slowdown as a fraction (default %(default)s)")
+    ap.add_argument('--scale', type=float, default=1.0, help="workload size factor")
+    ap.add_argument('--repeat', type=int, default=REPEAT)
+    ap.add_argument('--only', default=','.join(WORKLOADS),
+                    help="comma-separated subset of " + ", ".join(WORKLOADS))
+    args = ap.parse_args(argv)
+    REPEAT = max(1, args.repeat)
+    names = [n for n in args.only.split(',') if n]
+    unknown = [n for n in names if n not in WORKLOADS]
+    if unknown:
+        ap.error(f"unknown workload: {', '.join(unknown)}")
+
+    results = measure(names, args.scale)
+    for name, r in results.items():
+        print(f"{name:14s} {r['seconds']:8.3f}s  {r['units']:9d} units  "
+              f"{r['normalized']:9.2f} calibration units")
+
+    if args.update:
+        data = {'python': platform.python_version(), 'scale': args.scale,
+                'calibrate_loops': CALIBRATE_LOOPS, 'calibrate_runs': CALIBRATE_RUNS,
+                'workloads': results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"no baseline at {args.baseline}; run with --update first")
+        return 2
+    if baseline.get('scale') != args.scale:
+        print(f"baseline was measured at scale {baseline.get('scale')}, "
+              f"not {args.scale}; normalized times are not comparable")
+        return 2
+    if (baseline.get('calibrate_loops'), baseline.get('calibrate_runs')) != \
+            (CALIBRATE_LOOPS, CALIBRATE_RUNS):
+        print(f"baseline was calibrated with {baseline.get('calibrate_loops')} loops x "
+              f"{baseline.get('calibrate_runs')} runs, not {CALIBRATE_LOOPS} x {CALIBRATE_RUNS}; "
+              f"run with --update")
+        return 2
+
+    failed = False
+    for name, now, base, change, bad in compare(results, baseline, args.threshold):
+        if base is None:
+            print(f"{name:14s} no baseline")
+            continue
+        mark = "FAIL" if bad else "ok"
+        print(f"{name:14s} {now:9.2f} vs {base:9.2f}  {change:+7.1%}  {mark}")
+        failed = failed or bad
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 expectimax の枝刈りレポート（読んだ節点数 vs 強さ）
+Python 3.8+ で動作
+
+- 設定は「d深さ」か「a深さ」（adaptive_depth の基準）に、p確率の打ち切り、s出現マスの間引き数を
+  「:」でつなぐ。例: d4  d4:p1e-2  d4:s2  a3:p1e-2:s3
+- 最初の設定を基準（ふつうは全幅）にして、各設定について
+    局面集   1 手あたりの節点数、基準と同じ手を選んだ割合、
+             基準の探索で測った「選んだ手の値の損」（regret、評価値の単位）の平均
+    ゲーム   同じ出現シードで打った平均スコア・最大タイル・基準との対応のある差、1 手あたりの節点数
+- 全幅で深く読むと遅いので、ゲームは --max-moves で打ち切って比べる
+
+  python game_2048pr.py --settings d4,d4:p1e-2,d4:s2 --games 8 --max-moves 200
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import game_2048ai as ai
+import game_2048bb as bb
+import game_2048rp as rp
+import game_2048tour as tour
+import game_2048tt as tt
+
+SETTINGS = ('d4', 'd4:p1e-2', 'd4:s2', 'd4:p1e-2:s2', 'd4:p3e-2', 'a3', 'a3:p1e-2', 'd3')
+
+# ---------- 設定 ----------
+def parse_setting(spec: str) -> dict:
+    """'d4:p1e-2:s2' -> {'depth': 4, 'adaptive': False, 'cutoff': 0.01, 'sample': 2}"""
+    s = {'depth': None, 'adaptive': False, 'cutoff': 0.0, 'sample': 0}
+    for tok in spec.split(':'):
+        kind, arg = tok[:1], tok[1:]
+        try:
+            if kind in ('d', 'a'):
+                s['depth'] = int(arg)
+                s['adaptive'] = kind == 'a'
+            elif kind == 'p':
+                s['cutoff'] = float(arg)
+            elif kind == 's':
+                s['sample'] = int(arg)
+            else:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"bad setting {spec!r} (token {tok!r})") from None
+    if s['depth'] is None or s['depth'] < 1:
+        raise ValueError(f"setting {spec!r} needs d<depth> or a<depth>")
+    return s
+
+def _apply(s: dict) -> None:
+    ai.set_pruning(s['cutoff'], s['sample'])
+
+def _depth(s: dict, b: int) -> int:
+    return ai.adaptive_depth(b, s['depth']) if s['adaptive'] else s['depth']
+
+# ---------- 局面集 ----------
+def reference_values(task: tuple) -> list:
+    """task: (基準の設定, 盤面)。Returns: 方向ごとの値（動けない方向は None）"""
+    spec, b = task
+    s = parse_setting(spec)
+    _apply(s)
+    depth = _depth(s, b)
+    values = []
+    for d in range(4):
+        nb, moved, _ = bb.move(b, d)
+        values.append(ai.chance_value(nb, depth - 1) if moved else None)
+    ai.clear_cache()
+    return values
+
+def choose(task: tuple) -> tuple:
+    """task: (設定, 盤面)。Returns: (選んだ方向, 節点数)"""
+    spec, b = task
+    s = parse_setting(spec)
+    _apply(s)
+    n0 = ai.nodes
+    d, _ = ai.best_move(b, _depth(s, b))
+    nodes = ai.nodes - n0
+    ai.clear_cache()
+    return d, nodes
+
+def position_report(settings: list, boards: list, pool) -> dict:
+    """
+    boards は動ける局面だけにしておく（詰んだ局面には比べる手がない）
+    Returns: {設定: {'nodes', 'agree', 'regret'}}
+    """
+    ref = pool.map(reference_values, [(settings[0], b) for b in boards])
+    out = {}
+    for spec in settings:
+        picks = pool.map(choose, [(spec, b) for b in boards])
+        agree = regret = 0.0
+        for values, (d, _) in zip(ref, picks):
+            best = max(v for v in values if v is not None)
+            agree += values[d] == best
+            regret += best - values[d]
+        out[spec] = {'nodes': sum(n for _, n in picks) / len(boards),
+                     'agree': agree / len(boards), 'regret': regret / len(boards)}
+    return out
+
+# ---------- ゲーム ----------
+def play_game(task: tuple) -> dict:
+    spec, seed, max_moves = task
+    s = parse_setting(spec)
+    _apply(s)
+    n0 = ai.nodes
+
+    def policy(b):
+        return ai.best_move(b, _depth(s, b))[0]
+
+    b = score = moves = 0
+    for b, score, d in rp.play(seed, policy, max_moves):
+        if d is not None:
+            moves += 1
+    nodes = ai.nodes - n0
+    ai.clear_cache()
+    return {'setting': spec, 'seed': seed, 'score': score, 'max_tile': bb.max_tile(b),
+            'moves': moves, 'nodes': nodes}
+
+def game_report(settings: list, games: int, seed: int, max_moves: int, pool) -> dict:
+    """Returns: {設定: {'nodes', 'score', 'score_ci', 'log2_max', 'diff', 'diff_ci'}}"""
+    tasks = [(spec, seed + i, max_moves) for i in range(games) for spec in settings]
+    by = {spec: {} for spec in settings}
+    for r in pool.imap_unordered(play_game, tasks):
+        by[r['setting']][r['seed']] = r
+    base = by[settings[0]]
+    out = {}
+    for spec in settings:
+        rs = list(by[spec].values())
+        score, score_ci = tour.mean_ci([r['score'] for r in rs])
+        diff, diff_ci = tour.mean_ci([by[spec][k]['score'] - base[k]['score']
+                                      for k in by[spec]])
+        out[spec] = {'nodes': sum(r['nodes'] for r in rs) / max(sum(r['moves'] for r in rs), 1),
+                     'score': score, 'score_ci': score_ci,
+                     'log2_max': sum(math.log2(r['max_tile']) for r in rs) / len(rs),
+                     'diff': diff, 'diff_ci': diff_ci}
+    return out
+
+# ---------- エントリポイント ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Nodes searched vs playing strength "
+                                             "for expectimax pruning settings")
+    ap.add_argument('--settings', default=','.join(SETTINGS),
+                    help="comma-separated settings; the first is the reference")
+    ap.add_argument('--positions', type=int, default=30)
+    ap.add_argument('--games', type=int, default=8, help="games per setting")
+    ap.add_argument('--max-moves', type=int, default=200,
+                    help="stop each game after N moves (0 = play out)")
+    ap.add_argument('--seed', type=int, default=0, help="first spawn seed")
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+
+    settings = [spec for spec in args.settings.split(',') if spec]
+    try:
+        for spec in settings:
+            parse_setting(spec)
+    except ValueError as e:
+        ap.error(str(e))
+
+    t0 = time.perf_counter()
+    # 局面集は対局の途中から取るので詰んだ局面も混じる。比べる手がないので除く
+    boards = [b for b in tt.positions(args.positions) if bb.legal_moves(b)] if args.positions else []
+    with multiprocessing.Pool(args.workers) as pool:
+        pos = position_report(settings, boards, pool) if boards else {}
+        games = (game_report(settings, args.games, args.seed, args.max_moves, pool)
+                 if args.games else {})
+
+    ref = settings[0]
+    if pos:
+        print(f"{len(boards)} positions, reference {ref}")
+        print(f"{'setting':<14} {'nodes/move':>11} {'vs ref':>7} {'same move':>10} {'regret':>8}")
+        for spec in settings:
+            r = pos[spec]
+            print(f"{spec:<14} {r['nodes']:>11.0f} {pos[ref]['nodes'] / max(r['nodes'], 1):>6.1f}x"
+                  f" {r['agree']:>10.1%} {r['regret']:>8.1f}")
+    if games:
+        limit = f", {args.max_moves} moves max" if args.max_moves else ""
+        print(f"{args.games} games per setting{limit}")
+        print(f"{'setting':<14} {'nodes/move':>11} {'vs ref':>7} {'score':>18}"
+              f" {'log2 max':>9} {'- ' + ref:>20}")
+        for spec in settings:
+            r = games[spec]
+            print(f"{spec:<14} {r['nodes']:>11.0f}"
+                  f" {games[ref]['nodes'] / max(r['nodes'], 1):>6.1f}x"
+                  f" {r['score']:>10.1f} ±{r['score_ci']:<7.1f} {r['log2_max']:>9.2f}"
+                  f" {r['diff']:>+11.1f} ±{r['diff_ci']:<7.1f}")
+    print(f"done in {time.perf_counter() - t0:.1f}s with {args.workers} workers")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
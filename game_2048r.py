@@ -1,7 +1,9 @@
 import random
 import os
 import sys
-import copy
+
+import game_2048bb as bb
+from game_2048hist import SpillStack
 
 if os.name == 'nt':
     import msvcrt
@@ -114,8 +116,9 @@ def get_key():
 def main():
     board = init_board()
     score = 0
-    undo_stack = []
-    redo_stack = []
+    # 古い履歴はファイルに逃がすので、長いゲームでもメモリは増えない
+    undo_stack = SpillStack()
+    redo_stack = SpillStack()
     game_over = False
     is_redoing = False
     won = False  # ★2048達成フラグ
@@ -136,16 +139,18 @@ def main():
 
         elif key == 'u':
             if undo_stack:
-                redo_stack.append((copy.deepcopy(board), score))
-                board, score = undo_stack.pop()
+                redo_stack.push(bb.pack(board), score)
+                b, score = undo_stack.pop()
+                board = bb.unpack(b)
                 game_over = not can_move(board)
             is_redoing = False
             continue
 
         elif key == 'r':
             if redo_stack:
-                undo_stack.append((copy.deepcopy(board), score))
-                board, score = redo_stack.pop()
+                undo_stack.push(bb.pack(board), score)
+                b, score = redo_stack.pop()
+                board = bb.unpack(b)
                 is_redoing = True
             continue
 
@@ -163,7 +168,7 @@ def main():
 
             new_board, moved, gained = move_func(board)
             if moved:
-                undo_stack.append((copy.deepcopy(board), score))
+                undo_stack.push(bb.pack(board), score)
                 board = new_board
                 score += gained
                 add_random_tile(board)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 録画（asciicast v2 書き出し）
+Python 3.8+ で動作
+
+- 端末を使わずに盤面をフレーム文字列にする（print_board / draw_board と同じ配置）
+- リプレイファイル、または AI のライブプレイから .cast を書き出す
+- 行の文字列は行の値（16bit）ごとにキャッシュするので、大量のゲームでも軽い
+
+  python game_2048rec.py replays.jsonl -o casts/
+  python game_2048rec.py --live 1000 --seed 0 -o casts/
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import game_2048rp as rp
+
+SIZE = 4
+CELL_W = 6
+
+HOME = "\x1b[H"
+CLEAR = "\x1b[2J"
+EOL = "\x1b[K"
+EOS = "\x1b[J"
+RESET = "\x1b[0m"
+
+# draw_board の color_pair と同じ並び（白, シアン, 黄, マゼンタ, 赤, 緑）
+_COLORS = ((4, 37), (16, 36), (64, 33), (256, 35), (1024, 31))
+_COLOR_TOP = 32
+
+def _color(val: int) -> int:
+    for limit, fg in _COLORS:
+        if val <= limit:
+            return fg
+    return _COLOR_TOP
+
+# ---------- ヘッドレス描画 ----------
+class Renderer:
+    """
+    盤面をフレーム文字列にする
+    layout: 'text'   = print_board（枠付きの表）
+            'curses' = draw_board（中央寄せ、値ごとの色）
+    """
+
+    WIDTH = 48
+
+    def __init__(self, layout: str = 'text'):
+        if layout not in ('text', 'curses'):
+            raise ValueError(f"unknown layout {layout!r}")
+        self.layout = layout
+        self._rows = {}
+        if layout == 'text':
+            self.height = 3 + SIZE * 2 + 1
+        else:
+            self.height = 3 + SIZE * 2 + 2
+
+    def _render_row(self, row: int) -> str:
+        vals = [(row >> (4 * c)) & 0xF for c in range(SIZE)]
+        vals = [1 << e if e else 0 for e in vals]
+        if self.layout == 'text':
+            return ''.join(f"|{v:^6}" if v != 0 else "|      "
+                           for v in vals) + "|"
+        pad = ' ' * ((self.WIDTH - CELL_W * SIZE) // 2)
+        cells = []
+        for v in vals:
+            if v == 0:
+                cells.append(' ' * CELL_W)
+            else:
+                cells.append(f"\x1b[1;{_color(v)};40m"
+                             f"{str(v).center(CELL_W)}{RESET}")
+        return pad + ''.join(cells)
+
+    def row(self, row: int) -> str:
+        s = self._rows.get(row)
+        if s is None:
+            s = self._rows[row] = self._render_row(row)
+        return s
+
+    def lines(self, b: int, score: int) -> list:
+        rows = [self.row((b >> (16 * r)) & 0xFFFF) for r in range(SIZE)]
+        if self.layout == 'text':
+            sep = "+------+------+------+------+"
+            out = ["2048 Game", f"Score: {score}", ""]
+            for s in rows:
+                out.append(sep)
+                out.append(s)
+            out.append(sep)
+            return out
+        title = "2048 (Python Terminal)"
+        score_str = f"Score: {score}"
+        out = [title.center(self.WIDTH).rstrip(),
+               score_str.center(self.WIDTH).rstrip(), ""]
+        for s in rows:
+            out.append(s)
+            out.append("")
+        out.append("")
+        out.append("Replay".center(self.WIDTH).rstrip())
+        return out
+
+    def frame(self, b: int, score: int) -> str:
+        """カーソルを左上に戻して上書きするフレーム"""
+        return HOME + (EOL + "\r\n").join(self.lines(b, score)) + EOL + EOS
+
+# ---------- asciicast v2 ----------
+class CastWriter:
+    """
+    asciicast v2 を逐次書き出す
+    frame() の t を省略すると open からの経過時間（ライブ録画）
+    """
+
+    def __init__(self, f, renderer: Renderer, title: str = None):
+        self.f = f
+        self.renderer = renderer
+        self.frames = 0
+        header = {'version': 2, 'width': renderer.WIDTH,
+                  'height': renderer.height, 'timestamp': int(time.time())}
+        if title:
+            header['title'] = title
+        f.write(json.dumps(header) + '\n')
+        f.write(json.dumps([0.0, 'o', CLEAR]) + '\n')
+        self._t0 = time.perf_counter()
+
+    def frame(self, b: int, score: int, t: float = None) -> None:
+        if t is None:
+            t = time.perf_counter() - self._t0
+        self.f.write(json.dumps([round(t, 6), 'o',
+                                 self.renderer.frame(b, score)]) + '\n')
+        self.frames += 1
+
+def write_cast(path: str, states, renderer: Renderer,
+               interval: float = None, title: str = None) -> int:
+    """
+    (board, score, direction) の列を .cast に書く
+    interval を与えると一定間隔、None なら実時間
+    Returns: フレーム数
+    """
+    with open(path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+        w = CastWriter(f, renderer, title)
+        t = 0.0
+        for b, score, _ in states:
+            if interval is None:
+                w.frame(b, score)
+            else:
+                w.frame(b, score, t)
+                t += interval
+        return w.frames
+
+# ---------- エントリポイント ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Export 2048 games as asciicast v2")
+    ap.add_argument('replays', nargs='?', help="replay file (JSON Lines)")
+    ap.add_argument('--live', type=int, default=0,
+                    help="record N live AI games instead of a replay file")
+    ap.add_argument('--seed', type=int, default=0, help="first seed for --live")
+    ap.add_argument('--depth', type=int, default=1, help="AI depth for --live")
+    ap.add_argument('--layout', choices=('text', 'curses'), default='text')
+    ap.add_argument('--interval', type=float, default=0.1,
+                    help="seconds per move for replays")
+    ap.add_argument('-o', '--out', default='.', help="output directory")
+    args = ap.parse_args(argv)
+
+    if not args.replays and not args.live:
+        ap.error("give a replay file or --live N")
+    os.makedirs(args.out, exist_ok=True)
+    renderer = Renderer(args.layout)
+
+    if args.live:
+        policy = rp.search_policy(args.depth)
+        jobs = ((f"live {args.seed + i}", rp.play(args.seed + i, policy), None)
+                for i in range(args.live))
+    else:
+        jobs = ((f"seed {rec['seed']}", rp.replay(rec), args.interval)
+                for rec in rp.load(args.replays))
+
+    games = frames = 0
+    t0 = time.perf_counter()
+    for title, states, interval in jobs:
+        path = os.path.join(args.out, f"game_{games:05d}.cast")
+        frames += write_cast(path, states, renderer, interval, title)
+        games += 1
+    elapsed = time.perf_counter() - t0
+    print(f"{games} games, {frames} frames in {elapsed:.2f}s "
+          f"({frames / max(elapsed, 1e-9):.0f} frames/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 リプレイ（シード + 手順）
+Python 3.8+ で動作
+
+- 1 行 1 ゲームの JSON Lines
+  {"seed": 0, "moves": "LLUR...", "score": 1234, "board": "0123..."}
+- 出現タイルは random.Random(seed) で決まるので、seed と moves だけで盤面を再現できる
+- score / board は記録時の最終スコアと盤面（パック盤面の 16 進）
+"""
+
+import json
+import random
+
+import game_2048bb as bb
+
+MOVE_CHARS = 'UDLR'   # bb.UP / DOWN / LEFT / RIGHT の順
+
+class ReplayError(ValueError):
+    """手順が再現できない（不正な手など）"""
+
+    def __init__(self, step: int, message: str):
+        super().__init__(f"step {step}: {message}")
+        self.step = step
+
+# ---------- 再生 ----------
+def replay(record: dict):
+    """
+    リプレイを 1 手ずつ再生する
+    Yields: (board, score, direction)。最初は初期盤面で direction は None
+    """
+    rng = random.Random(record['seed'])
+    b = bb.new_game(rng)
+    score = 0
+    yield b, score, None
+    for step, ch in enumerate(record['moves']):
+        d = MOVE_CHARS.find(ch)
+        if d < 0:
+            raise ReplayError(step, f"unknown move {ch!r}")
+        b, moved, gained = bb.move(b, d)
+        if not moved:
+            raise ReplayError(step, f"illegal move {ch!r}")
+        score += gained
+        b = bb.add_random_tile(b, rng)
+        yield b, score, d
+
+def final_state(record: dict) -> tuple:
+    """最後まで再生した (board, score)"""
+    b = score = 0
+    for b, score, _ in replay(record):
+        pass
+    return b, score
+
+# ---------- 記録 ----------
+def search_policy(depth: int = 1):
+    """expectimax で打つ方策（board -> direction or None）"""
+    import game_2048ai as ai
+
+    def policy(b):
+        return ai.best_move(b, depth)[0]
+    return policy
+
+def play(seed: int, policy, max_moves: int = 0):
+    """
+    方策で 1 ゲーム打ちながら状態を流す（replay と同じ形）
+    max_moves が 0 なら詰むまで
+    """
+    rng = random.Random(seed)
+    b = bb.new_game(rng)
+    score = 0
+    yield b, score, None
+    n = 0
+    while not max_moves or n < max_moves:
+        d = policy(b)
+        if d is None:
+            return
+        b, moved, gained = bb.move(b, d)
+        if not moved:
+            return
+        score += gained
+        b = bb.add_random_tile(b, rng)
+        n += 1
+        yield b, score, d
+
+def make_record(seed: int, states) -> dict:
+    """play() / replay() の状態列からリプレイを作る"""
+    moves = []
+    b = score = 0
+    for b, score, d in states:
+        if d is not None:
+            moves.append(MOVE_CHARS[d])
+    return {'seed': seed, 'moves': ''.join(moves),
+            'score': score, 'board': f"{b:016x}"}
+
+def record(seed: int, policy, max_moves: int = 0) -> dict:
+    return make_record(seed, play(seed, policy, max_moves))
+
+# ---------- 入出力 ----------
+def load_lines(path: str):
+    """空行を除いた (行番号, 行) を返す。JSON としては読まない（壊れた行の扱いは呼び出し側）"""
+    with open(path, encoding='utf-8') as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                yield n, line
+
+def load(path: str):
+    for n, line in load_lines(path):
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"{path}:{n}: malformed record: {e}") from None
+
+def save(path: str, records) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for rec in records:
+            f.write(json.dumps(rec, separators=(',', ':')) + '\n')
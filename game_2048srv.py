@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 ゲームサーバ（asyncio / TCP）
+Python 3.8+ で動作
+
+- 1 接続 = 1 セッション。1 プロセスで数千セッションを同時に持つ
+- 1 行 1 コマンドのテキストプロトコル
+
+    クライアント → サーバ
+      N [seed]     新しいゲーム
+      U / D / L / R  移動
+      S            このセッションの統計
+      Q            終了
+    サーバ → クライアント
+      <board> <score> <status>   board はパック盤面の 16 進 16 桁
+                                 status: ok / illegal / over
+      STAT <moves> <p50_us> <max_us>
+      ERR <message>
+
+  python game_2048srv.py serve --port 2048
+  python game_2048srv.py load --clients 1000 --moves 200 --port 2048
+  python game_2048srv.py bench --clients 1000 --moves 200
+"""
+
+import argparse
+import array
+import asyncio
+import math
+import random
+import sys
+import time
+
+import game_2048bb as bb
+
+MOVE_CHARS = b'UDLR'   # bb.UP / DOWN / LEFT / RIGHT の順
+DRAIN_LIMIT = 1 << 16
+
+def percentiles(xs, qs=(0.5, 0.95, 0.99)) -> list:
+    xs = sorted(xs)
+    if not xs:
+        return [0.0 for _ in qs]
+    return [xs[min(len(xs) - 1, int(q * len(xs)))] for q in qs]
+
+# ---------- 処理時間の分布 ----------
+HIST_MIN = 1e-7                     # 100 ns 未満は最初の区間にまとめる
+HIST_STEPS = 8                      # 2 倍あたりの区間数（分位点の誤差は 9% 以内）
+HIST_BUCKETS = 32 * HIST_STEPS      # 100 ns から約 7 分まで
+
+class LatencyHistogram:
+    """
+    処理時間の対数ヒストグラム。件数が増えても大きさは一定で、並べ替えもしない
+    分位点は区間の上端（ただし最大値を超えない）で答える
+    """
+
+    __slots__ = ('counts', 'n', 'max')
+
+    def __init__(self):
+        self.counts = array.array('Q', bytes(8 * HIST_BUCKETS))
+        self.n = 0
+        self.max = 0.0
+
+    def add(self, dt: float) -> None:
+        i = int(math.log2(dt / HIST_MIN) * HIST_STEPS) + 1 if dt > HIST_MIN else 0
+        self.counts[min(i, HIST_BUCKETS - 1)] += 1
+        self.n += 1
+        if dt > self.max:
+            self.max = dt
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)) -> list:
+        out = []
+        for q in qs:
+            rank = min(self.n - 1, int(q * self.n))    # percentiles() と同じ位置
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen > rank:
+                    break
+            out.append(min(HIST_MIN * 2 ** (i / HIST_STEPS), self.max) if self.n else 0.0)
+        return out
+
+    def reset(self) -> None:
+        self.counts = array.array('Q', bytes(8 * HIST_BUCKETS))
+        self.n = 0
+        self.max = 0.0
+
+# ---------- セッション ----------
+class Session:
+    """1 ゲーム分の状態と、そのセッションの処理時間"""
+
+    __slots__ = ('board', 'score', 'rng', 'moves', 'latencies')
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.board = bb.new_game(self.rng)
+        self.score = 0
+        self.moves = 0
+        self.latencies = LatencyHistogram()
+
+    def step(self, d: int) -> bytes:
+        b, moved, gained = bb.move(self.board, d)
+        if not moved:
+            return b'over' if bb.lost(self.board) else b'illegal'
+        self.board = bb.add_random_tile(b, self.rng)
+        self.score += gained
+        self.moves += 1
+        return b'over' if bb.lost(self.board) else b'ok'
+
+    def line(self, status: bytes) -> bytes:
+        return b'%016x %d %s\n' % (self.board, self.score, status)
+
+# ---------- サーバ ----------
+class GameServer:
+    def __init__(self):
+        self.active = 0
+        self.sessions_total = 0
+        self.commands = 0
+        self.latencies = LatencyHistogram()   # 全セッションの処理時間（秒）
+        self._next_seed = 0
+
+    async def handle(self, reader, writer) -> None:
+        self.active += 1
+        session = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                cmd = line[:1]
+                if cmd and cmd in MOVE_CHARS:
+                    if session is None:
+                        resp = b'ERR no game\n'
+                    else:
+                        resp = session.line(session.step(MOVE_CHARS.index(cmd)))
+                elif cmd == b'N':
+                    parts = line.split()
+                    seed = None
+                    if len(parts) > 1:
+                        try:
+                            seed = int(parts[1])
+                        except ValueError:
+                            pass
+                    else:
+                        seed = self._next_seed
+                        self._next_seed += 1
+                    if seed is None:
+                        resp = b'ERR bad seed\n'    # 今のゲームはそのまま続ける
+                    else:
+                        session = Session(seed)
+                        self.sessions_total += 1
+                        resp = session.line(b'ok')
+                elif cmd == b'S':
+                    if session is None:
+                        resp = b'ERR no game\n'
+                    else:
+                        p50, = session.latencies.percentiles((0.5,))
+                        resp = b'STAT %d %d %d\n' % (
+                            session.moves, p50 * 1e6, session.latencies.max * 1e6)
+                elif cmd == b'Q':
+                    break
+                else:
+                    resp = b'ERR unknown command\n'
+                writer.write(resp)
+                dt = time.perf_counter() - t0
+                self.commands += 1
+                self.latencies.add(dt)
+                if session is not None:
+                    session.latencies.add(dt)
+                if writer.transport.get_write_buffer_size() > DRAIN_LIMIT:
+                    await writer.drain()
+        except (ConnectionError, ValueError):
+            pass        # ValueError は readline の行長超過
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def start(self, host: str, port: int):
+        return await asyncio.start_server(self.handle, host, port,
+                                          limit=1 << 12, backlog=4096)
+
+    def report(self, reset: bool = False) -> str:
+        """reset なら処理時間の分布をこの報告で空にする（次の報告は次の区間だけ）"""
+        p50, p95, p99 = self.latencies.percentiles()
+        text = (f"server: {self.sessions_total} sessions, {self.commands} commands, "
+                f"latency p50 {p50 * 1e6:.1f} us, p95 {p95 * 1e6:.1f} us, "
+                f"p99 {p99 * 1e6:.1f} us")
+        if reset:
+            self.latencies.reset()
+        return text
+
+# ---------- 負荷生成 ----------
+async def load_client(host: str, port: int, seed: int, moves: int,
+                      rtts: array.array) -> int:
+    """1 クライアント。動ける方向からランダムに全速で打つ"""
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    writer.write(b'N %d\n' % seed)
+    resp = await reader.readline()
+    done = 0
+    while done < moves:
+        b = int(resp[:16], 16)
+        mask = bb.legal_moves(b)
+        if not mask:
+            msg = b'N %d\n' % rng.getrandbits(31)
+        else:
+            d = rng.choice([d for d in range(4) if mask >> d & 1])
+            msg = MOVE_CHARS[d:d + 1] + b'\n'
+        t0 = time.perf_counter()
+        writer.write(msg)
+        resp = await reader.readline()
+        rtts.append(time.perf_counter() - t0)
+        if not resp or resp.startswith(b'ERR'):
+            break
+        done += 1
+    writer.write(b'Q\n')
+    writer.close()
+    return done
+
+async def run_load(host: str, port: int, clients: int, moves: int) -> str:
+    rtts = array.array('d')
+    t0 = time.perf_counter()
+    done = await asyncio.gather(*(load_client(host, port, i, moves, rtts)
+                                  for i in range(clients)))
+    elapsed = time.perf_counter() - t0
+    total = sum(done)
+    p50, p95, p99 = percentiles(rtts)
+    return (f"load: {clients} clients, {total} moves in {elapsed:.2f}s "
+            f"({total / elapsed:.0f} moves/s), round trip p50 {p50 * 1e3:.2f} ms, "
+            f"p95 {p95 * 1e3:.2f} ms, p99 {p99 * 1e3:.2f} ms")
+
+async def bench(host: str, port: int, clients: int, moves: int) -> None:
+    """サーバと負荷生成を同じプロセスで動かす（localhost での確認用）"""
+    server = GameServer()
+    srv = await server.start(host, port)
+    try:
+        print(await run_load(host, port, clients, moves))
+        print(server.report())
+    finally:
+        srv.close()
+        await srv.wait_closed()
+
+async def serve(host: str, port: int, interval: float) -> None:
+    server = GameServer()
+    srv = await server.start(host, port)
+    print(f"listening on {host}:{port}")
+    async with srv:
+        while True:
+            await asyncio.sleep(interval)
+            print(f"{server.active} active, " + server.report(reset=True))
+
+# ---------- エントリポイント ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="2048 multi-session game server")
+    ap.add_argument('mode', choices=('serve', 'load', 'bench'))
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=2048)
+    ap.add_argument('--clients', type=int, default=100)
+    ap.add_argument('--moves', type=int, default=200, help="moves per client")
+    ap.add_argument('--interval', type=float, default=10.0,
+                    help="seconds between server reports")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.mode == 'serve':
+            asyncio.run(serve(args.host, args.port, args.interval))
+        elif args.mode == 'load':
+            print(asyncio.run(run_load(args.host, args.port,
+                                       args.clients, args.moves)))
+        else:
+            asyncio.run(bench(args.host, args.port, args.clients, args.moves))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
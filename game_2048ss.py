@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 セッションストア（大量の同時ゲーム用）
+Python 3.8+ で動作
+
+- セッションはオブジェクトではなく番号。状態は列ごとの array にまとめる
+- 盤面はパック盤面、出現の乱数は 64bit の splitmix64（random.Random を持たない）
+- Undo / Redo は直近 HISTORY 手ぶんのリング（盤面の XOR 差分と得点）
+
+1 セッションあたりのバイト数（HISTORY = 8）
+  board 8 + score 4 + rng 8 + flags 1 + hist_pos 1 + hist_len 1 + redo_len 1
+  + deltas 8 * 8 + gains 4 * 8 = 120 バイト
+（リスト盤面 + deepcopy の undo_stack だと、数手で数 KB になる）
+
+  python game_2048ss.py --sessions 100000 --steps 20
+"""
+
+import argparse
+import array
+import copy
+import random
+import sys
+import time
+import tracemalloc
+
+import game_2048bb as bb
+
+HISTORY = 8
+M64 = (1 << 64) - 1
+
+# flags
+GAME_OVER = 1
+WON = 2
+IS_REDOING = 4
+ACTIVE = 8
+
+WIN_EXP = 11   # 2048
+
+def splitmix64(state: int) -> tuple:
+    """Returns: (new_state, random_64bit)"""
+    state = (state + 0x9E3779B97F4A7C15) & M64
+    z = state
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & M64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & M64
+    return state, z ^ (z >> 31)
+
+class SessionStore:
+    """struct-of-arrays のセッション表"""
+
+    __slots__ = ('history', 'board', 'score', 'rng', 'flags', 'hist_pos',
+                 'hist_len', 'redo_len', 'deltas', 'gains', 'free', 'count')
+
+    def __init__(self, history: int = HISTORY):
+        self.history = history
+        self.board = array.array('Q')
+        self.score = array.array('I')
+        self.rng = array.array('Q')
+        self.flags = array.array('B')
+        self.hist_pos = array.array('B')
+        self.hist_len = array.array('B')
+        self.redo_len = array.array('B')
+        self.deltas = array.array('Q')
+        self.gains = array.array('I')
+        self.free = array.array('I')   # 空いている番号
+        self.count = 0
+
+    def bytes_per_session(self) -> float:
+        cols = (self.board, self.score, self.rng, self.flags, self.hist_pos,
+                self.hist_len, self.redo_len, self.deltas, self.gains)
+        return sum(c.itemsize * len(c) for c in cols) / max(len(self.board), 1)
+
+    # ---------- 生成・破棄 ----------
+    def create(self, seed: int) -> int:
+        if self.free:
+            sid = self.free.pop()
+        else:
+            sid = len(self.board)
+            for col in (self.board, self.score, self.rng, self.flags,
+                        self.hist_pos, self.hist_len, self.redo_len):
+                col.append(0)
+            self.deltas.extend([0] * self.history)
+            self.gains.extend([0] * self.history)
+        self.rng[sid] = seed & M64
+        self.board[sid] = self._spawn(sid, self._spawn(sid, 0))
+        self.score[sid] = 0
+        self.flags[sid] = ACTIVE
+        self.hist_pos[sid] = self.hist_len[sid] = self.redo_len[sid] = 0
+        self.count += 1
+        return sid
+
+    def evict(self, sid: int) -> None:
+        if self.flags[sid] & ACTIVE:
+            self.flags[sid] = 0
+            self.free.append(sid)
+            self.count -= 1
+
+    def _check(self, sid: int) -> None:
+        """使われていない番号（破棄済み・範囲外）なら KeyError"""
+        if not (0 <= sid < len(self.flags) and self.flags[sid] & ACTIVE):
+            raise KeyError(f"no active session {sid}")
+
+    def _spawn(self, sid: int, b: int) -> int:
+        empty = bb.empty_shifts(b)
+        if not empty:
+            return b
+        self.rng[sid], z = splitmix64(self.rng[sid])
+        s = empty[z % len(empty)]
+        return b | (2 if (z >> 32) % 10 == 0 else 1) << s
+
+    # ---------- 操作 ----------
+    def step(self, sid: int, d: int) -> bool:
+        """移動して出現まで。動かなければ False"""
+        self._check(sid)
+        old = self.board[sid]
+        nb, moved, gained = bb.move(old, d)
+        if not moved:
+            return False
+        nb = self._spawn(sid, nb)
+        k = self.history
+        pos = self.hist_pos[sid]
+        i = sid * k + pos
+        self.deltas[i] = old ^ nb
+        self.gains[i] = gained
+        self.hist_pos[sid] = (pos + 1) % k
+        if self.hist_len[sid] < k:
+            self.hist_len[sid] += 1
+        self.redo_len[sid] = 0
+        self.board[sid] = nb
+        self.score[sid] += gained
+        flags = self.flags[sid] & ~IS_REDOING
+        if bb.max_exponent(nb) >= WIN_EXP:
+            flags |= WON
+        if bb.lost(nb):
+            flags |= GAME_OVER
+        self.flags[sid] = flags
+        return True
+
+    def undo(self, sid: int) -> bool:
+        self._check(sid)
+        if not self.hist_len[sid]:
+            return False
+        k = self.history
+        pos = (self.hist_pos[sid] - 1) % k
+        i = sid * k + pos
+        self.board[sid] ^= self.deltas[i]
+        self.score[sid] -= self.gains[i]
+        self.hist_pos[sid] = pos
+        self.hist_len[sid] -= 1
+        self.redo_len[sid] += 1
+        self.flags[sid] &= ~(GAME_OVER | IS_REDOING)
+        return True
+
+    def redo(self, sid: int) -> bool:
+        self._check(sid)
+        if not self.redo_len[sid]:
+            return False
+        k = self.history
+        pos = self.hist_pos[sid]
+        i = sid * k + pos
+        self.board[sid] ^= self.deltas[i]
+        self.score[sid] += self.gains[i]
+        self.hist_pos[sid] = (pos + 1) % k
+        self.hist_len[sid] += 1
+        self.redo_len[sid] -= 1
+        flags = self.flags[sid] | IS_REDOING
+        if bb.lost(self.board[sid]):
+            flags |= GAME_OVER
+        self.flags[sid] = flags
+        return True
+
+    def to_list(self, sid: int) -> list:
+        self._check(sid)
+        return bb.unpack(self.board[sid])
+
+# ---------- ベンチマーク ----------
+def _legacy_session(rng) -> dict:
+    """今の UI と同じ持ち方（比較用）"""
+    board = bb.unpack(bb.new_game(rng))
+    return {'board': board, 'score': 0, 'undo_stack': [], 'redo_stack': [],
+            'game_over': False, 'is_redoing': False, 'won': False}
+
+def _legacy_step(s: dict, d: int, rng) -> None:
+    b, moved, gained = bb.move(bb.pack(s['board']), d)
+    if moved:
+        s['undo_stack'].append((copy.deepcopy(s['board']), s['score']))
+        s['board'] = bb.unpack(bb.add_random_tile(b, rng))
+        s['score'] += gained
+
+def legacy_bytes(sessions: int, steps: int) -> float:
+    rng = random.Random(0)
+    tracemalloc.start()
+    games = [_legacy_session(rng) for _ in range(sessions)]
+    for _ in range(steps):
+        for s in games:
+            _legacy_step(s, rng.randrange(4), rng)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / sessions
+
+def bench(sessions: int, steps: int) -> str:
+    rng = random.Random(0)
+    # 列は作成時に確保しきるので、メモリは作成だけを追跡する（追跡中は遅い）
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    store = SessionStore()
+    sids = [store.create(i) for i in range(sessions)]
+    t1 = time.perf_counter()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    moves = 0
+    for _ in range(steps):
+        for sid in sids:
+            if store.step(sid, rng.randrange(4)):
+                moves += 1
+    t2 = time.perf_counter()
+    for sid in sids:
+        store.evict(sid)
+    t3 = time.perf_counter()
+    return (f"{sessions} sessions: create {t1 - t0:.2f}s (traced), "
+            f"{moves} steps {t2 - t1:.2f}s ({moves / max(t2 - t1, 1e-9):.0f}/s), "
+            f"evict {t3 - t2:.2f}s\n"
+            f"store: {store.bytes_per_session():.0f} bytes/session in arrays, "
+            f"{traced / sessions:.0f} bytes/session traced "
+            f"(includes the benchmark's id list)")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the compact session store")
+    ap.add_argument('--sessions', type=int, default=100000)
+    ap.add_argument('--steps', type=int, default=20, help="moves per session")
+    ap.add_argument('--legacy', type=int, default=1000,
+                    help="sessions for the list/deepcopy comparison (0 = skip)")
+    args = ap.parse_args(argv)
+
+    print(bench(args.sessions, args.steps))
+    if args.legacy:
+        print(f"legacy: {legacy_bytes(args.legacy, args.steps):.0f} bytes/session "
+              f"(nested list board + deepcopy undo_stack, {args.steps} moves)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 表のディスクキャッシュ（版付きバイナリを mmap で読む）
+Python 3.8+ で動作
+
+- 行テーブルや評価テーブルを 1 回だけ作ってファイルに書き、以後のプロセスは mmap で読むだけ
+  ページは OS が共有するので、プールのワーカーがいくつあっても実体は 1 つ
+- ヘッダに形式の版と「鍵」（表の版や重み）のハッシュを書く。違っていれば作り直して置き換える
+- 置き換えは一時ファイル → os.replace なので、同時に作り直しても壊れたファイルは見えない
+- 置き場所は GAME_2048_TABLE_CACHE（既定 ~/.cache/game_2048）。"off" ならキャッシュしない
+
+  python game_2048tc.py            # 状態を表示
+  python game_2048tc.py --rebuild  # 全部作り直す
+"""
+
+import argparse
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+FORMAT_VERSION = 1
+MAGIC = b'G2048TBL'
+ALIGN = 8
+
+_HEAD = struct.Struct('<8sI32sI')     # magic, 形式の版, 鍵のハッシュ, 表の数
+_SECTION = struct.Struct('<cxxxQ')    # 型コード, 要素数
+
+def cache_dir() -> str:
+    return os.environ.get('GAME_2048_TABLE_CACHE') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'game_2048')
+
+def cache_path(name: str) -> str:
+    return os.path.join(cache_dir(), f"{name}.bin")
+
+def _digest(typecodes: str, key) -> bytes:
+    return hashlib.blake2b(repr((FORMAT_VERSION, typecodes, key)).encode(),
+                           digest_size=32).digest()
+
+def _aligned(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _open(path: str, digest: bytes, typecodes: str):
+    """合うキャッシュがあれば memoryview のリスト、なければ None"""
+    try:
+        with open(path, 'rb') as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, stored, count = _HEAD.unpack_from(m)
+        if (magic != MAGIC or version != FORMAT_VERSION or stored != digest
+                or count != len(typecodes)):
+            return None
+        off = _HEAD.size
+        sections = []
+        for _ in range(count):
+            tc, n = _SECTION.unpack_from(m, off)
+            sections.append((tc.decode(), n))
+            off += _SECTION.size
+        off = _aligned(off)
+        view = memoryview(m)
+        tables = []
+        for (tc, n), want in zip(sections, typecodes):
+            size = array.array(want).itemsize * n
+            if tc != want or off + size > len(m):
+                return None
+            tables.append(view[off:off + size].cast(tc))
+            off = _aligned(off + size)
+        return tables
+    except struct.error:
+        return None
+
+def _write(path: str, digest: bytes, typecodes: str, tables: list) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    head = _HEAD.pack(MAGIC, FORMAT_VERSION, digest, len(typecodes))
+    head += b''.join(_SECTION.pack(tc.encode(), len(t))
+                     for tc, t in zip(typecodes, tables))
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(head.ljust(_aligned(len(head)), b'\0'))
+            for tc, t in zip(typecodes, tables):
+                data = array.array(tc, t).tobytes()
+                f.write(data.ljust(_aligned(len(data)), b'\0'))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def load(name: str, key, typecodes: str, build) -> list:
+    """
+    build() が返す表のリストを、typecodes（array の型コード、表ごとに 1 文字）で
+    キャッシュして返す。key が変われば作り直す。
+    Returns: 読み出し専用の memoryview のリスト（キャッシュできなければ build() の結果）
+    """
+    if cache_dir() == 'off':
+        return build()
+    path = cache_path(name)
+    digest = _digest(typecodes, key)
+    tables = _open(path, digest, typecodes)
+    if tables is not None:
+        return tables
+    tables = build()
+    try:
+        _write(path, digest, typecodes, tables)
+    except OSError:
+        return tables
+    return _open(path, digest, typecodes) or tables
+
+# ---------- CLI ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Inspect or rebuild the table cache")
+    ap.add_argument('--rebuild', action='store_true', help="delete and rebuild")
+    args = ap.parse_args(argv)
+
+    names = ('rows', 'zobrist_moves', 'row_cells', 'heuristic')
+    if args.rebuild:
+        for name in names:
+            try:
+                os.unlink(cache_path(name))
+            except FileNotFoundError:
+                pass
+    t0 = time.perf_counter()
+    import game_2048ai  # noqa: F401  表を読む（なければ作る）
+    import game_2048bd  # noqa: F401
+    elapsed = time.perf_counter() - t0
+    import game_2048bb
+    game_2048bb.load_zobrist_moves()   # 差分表は使うときに読むので、ここで作っておく
+    print(f"cache: {cache_dir()}")
+    for name in names:
+        path = cache_path(name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        print(f"  {name + '.bin':16s} {size:9d} bytes")
+    print(f"import of the engine, heuristic and Board modules: {elapsed * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
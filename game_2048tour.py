@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 AI 方策の対戦ハーネス
+Python 3.8+ で動作
+
+- すべての方策を同じ出現シード（共通乱数）で打たせる
+- ゲームはプロセスプールに分散し、1 ゲームごとに JSON Lines で書き出す
+- スコアと最大タイルの平均・95% 信頼区間、基準方策との対応のある差を出す
+
+  python game_2048tour.py --games 200 --policies random,heuristic,search
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import game_2048ai as ai
+import game_2048bb as bb
+import game_2048mc as mc
+import game_2048rp as rp
+
+Z95 = 1.96
+
+# ---------- 方策 ----------
+def random_policy(rng):
+    """動ける方向から一様に選ぶ（game_2048g3 の computer_random_move と同じ）"""
+    def policy(b):
+        mask = bb.legal_moves(b)
+        moves = [d for d in range(4) if mask >> d & 1]
+        return rng.choice(moves) if moves else None
+    return policy
+
+def make_policy(name: str, seed: int):
+    # 方策自身の乱数は出現用の乱数と別系統にする（共通乱数を崩さない）
+    if name == 'random':
+        return random_policy(random.Random(seed ^ 0x5EED))
+    if name == 'heuristic':
+        return rp.search_policy(1)
+    if name == 'search':
+        return rp.search_policy(2)
+    if name == 'mc':
+        return mc.mc_policy(seed=seed ^ 0x5EED)
+    raise ValueError(f"unknown policy {name!r}")
+
+POLICIES = ('random', 'heuristic', 'search')
+EXTRA_POLICIES = ('mc',)      # 遅いので既定の対戦には入れない
+
+# ---------- 1 ゲーム ----------
+def play_game(task: tuple) -> dict:
+    name, seed, max_moves = task
+    # 探索キャッシュはワーカーの中で方策をまたいで共有される。深く読んだ方策の結果を
+    # 浅い方策が引かないよう、ゲームごとに空にする（結果が実行順に左右されない）
+    ai.clear_cache()
+    policy = make_policy(name, seed)
+    t0 = time.perf_counter()
+    b = score = moves = 0
+    for b, score, d in rp.play(seed, policy, max_moves):
+        if d is not None:
+            moves += 1
+    ai.clear_cache()
+    return {'policy': name, 'seed': seed, 'score': score,
+            'max_tile': bb.max_tile(b), 'moves': moves,
+            'seconds': round(time.perf_counter() - t0, 4)}
+
+# ---------- 集計 ----------
+def mean_ci(xs: list) -> tuple:
+    """(平均, 95% 信頼区間の半幅)"""
+    n = len(xs)
+    if n == 0:
+        return 0.0, 0.0
+    m = sum(xs) / n
+    if n == 1:
+        return m, 0.0
+    var = sum((x - m) ** 2 for x in xs) / (n - 1)
+    return m, Z95 * math.sqrt(var / n)
+
+def summarize(results: list, policies: list) -> str:
+    by = {p: {} for p in policies}
+    for r in results:
+        by[r['policy']][r['seed']] = r
+    lines = [f"{'policy':<10} {'games':>6} {'score':>18} {'log2 max':>14}"
+             f" {'>=2048':>7}"]
+    for p in policies:
+        rs = list(by[p].values())
+        s, s_ci = mean_ci([r['score'] for r in rs])
+        t, t_ci = mean_ci([math.log2(r['max_tile']) for r in rs if r['max_tile']])
+        won = sum(r['max_tile'] >= 2048 for r in rs) / max(len(rs), 1)
+        lines.append(f"{p:<10} {len(rs):>6} {s:>10.1f} ±{s_ci:<7.1f}"
+                     f" {t:>6.2f} ±{t_ci:<5.2f} {won:>7.1%}")
+
+    # 同じシード同士の差（共通乱数で分散が小さくなる）
+    base = policies[0]
+    for p in policies[1:]:
+        seeds = by[base].keys() & by[p].keys()
+        diffs = [by[p][s]['score'] - by[base][s]['score'] for s in seeds]
+        d, d_ci = mean_ci(diffs)
+        lines.append(f"{p} - {base}: {d:+.1f} ±{d_ci:.1f} "
+                     f"(paired, {len(diffs)} seeds)")
+    return '\n'.join(lines)
+
+# ---------- エントリポイント ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Compare 2048 policies on common seeds")
+    ap.add_argument('--games', type=int, default=100, help="games per policy")
+    ap.add_argument('--policies', default=','.join(POLICIES),
+                    help="comma-separated subset of "
+                         + ", ".join(POLICIES + EXTRA_POLICIES))
+    ap.add_argument('--seed', type=int, default=0, help="first spawn seed")
+    ap.add_argument('--max-moves', type=int, default=0,
+                    help="stop each game after N moves (0 = play out)")
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('-o', '--out', default='tournament.jsonl')
+    args = ap.parse_args(argv)
+
+    policies = args.policies.split(',')
+    for p in policies:
+        make_policy(p, 0)
+    # シードごとに全方策を並べ、途中で止めても対応のある比較ができるようにする
+    tasks = [(p, args.seed + i, args.max_moves)
+             for i in range(args.games) for p in policies]
+
+    results = []
+    t0 = time.perf_counter()
+    with open(args.out, 'w', encoding='utf-8') as f, \
+            multiprocessing.Pool(args.workers) as pool:
+        for r in pool.imap_unordered(play_game, tasks, chunksize=4):
+            f.write(json.dumps(r) + '\n')
+            f.flush()
+            results.append(r)
+    elapsed = time.perf_counter() - t0
+
+    print(summarize(results, policies))
+    print(f"{len(results)} games in {elapsed:.1f}s with {args.workers} workers")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
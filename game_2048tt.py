@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 共有メモリの置換表（複数プロセスの expectimax 用）
+Python 3.8+ で動作
+
+- multiprocessing.shared_memory 上の固定サイズの表。鍵はパック盤面
+- 1 バケット 2 スロット: 深さ優先（深い結果を残す）+ 常に上書き
+- ロックなし。スロットは (check, 値のビット, meta) の 24 バイトで、
+  check = 盤面 ^ 値のビット ^ meta。別プロセスの書き込みと重なって壊れたスロットは
+  check が合わないので、読む側でただの空振りになる
+- meta = 深さ | 書いたワーカー番号 << 8。他のワーカーが書いた結果に当たった数も数える
+- parallel_best_move() は根の「移動 × 出現」をプロセスプールに配り、
+  各ワーカーは game_2048ai の探索をこの表と共有して進める
+
+  python game_2048tt.py --workers 1,2,4 --depth 4
+"""
+
+import argparse
+import multiprocessing
+import random
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+import game_2048ai as ai
+import game_2048bb as bb
+
+BUCKET_BITS = 18          # 2**18 バケット × 2 スロット × 24 バイト = 12 MB
+MAX_WORKERS = 64          # 統計の欄の数。ワーカー番号は 1 から（0 は親）なので、プールは 63 まで
+M64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+_SLOT = struct.Struct('<Q8sQ')      # check, 値（double）のバイト列, meta
+_VALUE = struct.Struct('<d')
+_STATS = struct.Struct('<QQQQ')     # 引いた数, 当たり, 他ワーカーの結果に当たり, 書いた数
+
+class SharedTable:
+    """共有メモリの置換表。create=False なら name の表につなぐ"""
+
+    def __init__(self, name: str = None, bucket_bits: int = BUCKET_BITS,
+                 create: bool = True, worker: int = 0):
+        if not 0 <= worker < MAX_WORKERS:
+            # 統計の欄からはみ出すと、表の先頭のバケットを書きつぶしてしまう
+            raise ValueError(f"worker id {worker} out of range 0..{MAX_WORKERS - 1} "
+                             f"(pools sharing a table are limited to {MAX_WORKERS - 1} "
+                             f"workers and must not respawn them)")
+        self.bucket_bits = bucket_bits
+        self.worker = worker
+        self._stats_size = _STATS.size * MAX_WORKERS
+        size = self._stats_size + (2 * _SLOT.size << bucket_bits)
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self.lookups = self.hits = self.cross = self.stores = 0
+
+    def _slot(self, b: int) -> int:
+        """b のバケットの先頭スロットのオフセット"""
+        i = ((b * GOLDEN) & M64) >> (64 - self.bucket_bits)
+        return self._stats_size + 2 * _SLOT.size * i
+
+    def get(self, b: int):
+        """Returns: (depth, value) か None"""
+        self.lookups += 1
+        off = self._slot(b)
+        for o in (off, off + _SLOT.size):
+            check, vbytes, meta = _SLOT.unpack_from(self.buf, o)
+            if check and check ^ int.from_bytes(vbytes, 'little') ^ meta == b:
+                self.hits += 1
+                if meta >> 8 != self.worker:
+                    self.cross += 1
+                return meta & 0xFF, _VALUE.unpack(vbytes)[0]
+        return None
+
+    def put(self, b: int, depth: int, v: float) -> None:
+        off = self._slot(b)
+        check, vbytes, meta = _SLOT.unpack_from(self.buf, off)
+        same = check ^ int.from_bytes(vbytes, 'little') ^ meta == b
+        if check and not same and (meta & 0xFF) > depth:
+            off += _SLOT.size         # 深い結果は残し、2 つ目のスロットに書く
+        elif check and same and (meta & 0xFF) > depth:
+            return
+        vbytes = _VALUE.pack(v)
+        meta = depth | self.worker << 8
+        _SLOT.pack_into(self.buf, off, b ^ int.from_bytes(vbytes, 'little') ^ meta,
+                        vbytes, meta)
+        self.stores += 1
+
+    def publish_stats(self) -> None:
+        """自分の数を共有メモリの自分の欄に書く（親が集計する）"""
+        _STATS.pack_into(self.buf, _STATS.size * self.worker,
+                         self.lookups, self.hits, self.cross, self.stores)
+
+    def stats(self) -> list:
+        """ワーカーごとの (引いた数, 当たり, 他ワーカーの結果に当たり, 書いた数)"""
+        return [_STATS.unpack_from(self.buf, _STATS.size * w)
+                for w in range(MAX_WORKERS)]
+
+    def close(self) -> None:
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
+
+# ---------- ワーカー ----------
+def _init_worker(name: str, bucket_bits: int, counter) -> None:
+    if name is None:
+        ai.shared_table = None
+        return
+    with counter.get_lock():
+        counter.value += 1
+        worker = counter.value
+    ai.shared_table = SharedTable(name, bucket_bits, create=False, worker=worker)
+
+def _search(task: tuple) -> tuple:
+    """task: (根の方向, 出現の確率, 出現後の盤面, 深さ)。Returns: (方向, 確率 × 値)"""
+    d, p, child, depth = task
+    v = ai.best_move(child, depth)[1]
+    if ai.shared_table is not None:
+        ai.shared_table.publish_stats()
+    return d, p * v
+
+def parallel_best_move(b: int, depth: int, pool) -> tuple:
+    """
+    best_move(b, depth) と同じ値を、根の移動 × 出現マス × {2, 4} に分けて並列に求める
+    Returns: (direction_int or None, value)
+    """
+    tasks = []
+    afters = {}
+    for d in range(4):
+        nb, moved, _ = bb.move(b, d)
+        if moved:
+            afters[d] = nb
+            for s in bb.empty_shifts(nb):
+                tasks.append((d, 0.9, nb | 1 << s, depth - 1))
+                tasks.append((d, 0.1, nb | 2 << s, depth - 1))
+    if depth <= 1 or not tasks:
+        return ai.best_move(b, depth)
+    totals = dict.fromkeys(afters, 0.0)
+    for d, pv in pool.imap_unordered(_search, tasks, chunksize=2):
+        totals[d] += pv
+    best_dir = None
+    best = 0.0
+    for d, total in totals.items():
+        v = total / len(bb.empty_shifts(afters[d]))
+        if best_dir is None or v > best:
+            best_dir, best = d, v
+    return best_dir, best
+
+# ---------- ベンチマーク ----------
+def positions(n: int, seed: int = 48) -> list:
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        b = bb.new_game(rng)
+        for i in range(300):
+            d, _ = ai.best_move(b, 1)
+            if d is None:
+                break
+            b = bb.add_random_tile(bb.move(b, d)[0], rng)
+            if i % 30 == 29:
+                out.append(b)
+    ai.clear_cache()
+    return out[:n]
+
+def bench(workers: int, depth: int, boards: list, share: bool, bucket_bits: int) -> str:
+    if share and workers >= MAX_WORKERS:
+        # 初期化で例外を出すワーカーはプールが作り直し続けるので、先に弾く
+        raise ValueError(f"a shared table supports at most {MAX_WORKERS - 1} workers")
+    table = SharedTable(bucket_bits=bucket_bits) if share else None
+    counter = multiprocessing.Value('i', 0)
+    try:
+        with multiprocessing.Pool(workers, _init_worker,
+                                  (table.name if table else None, bucket_bits,
+                                   counter)) as pool:
+            t0 = time.perf_counter()
+            for b in boards:
+                parallel_best_move(b, depth, pool)
+            elapsed = time.perf_counter() - t0
+        line = (f"{workers} workers, {'shared' if share else 'private'} table: "
+                f"{elapsed:.2f}s ({len(boards) / elapsed:.2f} positions/s)")
+        if table is not None:
+            rows = [r for r in table.stats() if r[0]]
+            lookups = sum(r[0] for r in rows)
+            hits = sum(r[1] for r in rows)
+            cross = sum(r[2] for r in rows)
+            line += (f", {lookups} lookups, hit rate {hits / max(lookups, 1):.1%}, "
+                     f"cross-worker {cross / max(lookups, 1):.1%} of lookups")
+        return line
+    finally:
+        if table is not None:
+            table.close()
+            table.unlink()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the shared transposition table")
+    ap.add_argument('--workers', default='1,2,4', help="comma-separated worker counts")
+    ap.add_argument('--depth', type=int, default=4)
+    ap.add_argument('--positions', type=int, default=10)
+    ap.add_argument('--bucket-bits', type=int, default=BUCKET_BITS)
+    args = ap.parse_args(argv)
+
+    counts = [int(w) for w in args.workers.split(',')]
+    if max(counts) >= MAX_WORKERS:
+        ap.error(f"at most {MAX_WORKERS - 1} workers can share a table")
+    boards = positions(args.positions)
+    for n in counts:
+        for share in (False, True):
+            print(bench(n, args.depth, boards, share, args.bucket_bits))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
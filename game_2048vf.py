@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 リプレイ検証（申告スコアの確認）
+Python 3.8+ で動作
+
+- game_2048rp 形式のリプレイを高速エンジンで最初から打ち直す
+- 1 手ずつ合法か確かめ、不正な手があればその手で打ち切る
+- 最後まで通れば、申告された score / board と突き合わせる
+- プロセスプールで並列に検証し、1 秒あたりの検証数を出す
+
+  python game_2048vf.py replays.jsonl --workers 4 --failures bad.jsonl
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import game_2048rp as rp
+
+def verify(item: tuple) -> dict:
+    """
+    item: (行番号, 行の文字列)。JSON の解釈もワーカーでする（壊れた行はその行だけ不合格）
+    Returns: {'line', 'seed', 'ok', 'moves', 'error'}
+    """
+    line, text = item
+    result = {'line': line, 'seed': None, 'ok': False, 'moves': 0, 'error': None}
+    try:
+        record = json.loads(text)
+    except ValueError as e:
+        result['error'] = f"malformed record: {e}"
+        return result
+    if not isinstance(record, dict):
+        result['error'] = f"malformed record: expected an object, got {type(record).__name__}"
+        return result
+    result['seed'] = record.get('seed')
+    try:
+        # 申告の盤面も先に読んでおく（壊れた申告 1 件でバッチ全体を止めない）
+        claimed_board = int(record['board'], 16) if 'board' in record else None
+        b, score = rp.final_state(record)
+    except rp.ReplayError as e:
+        result['moves'] = e.step
+        result['error'] = str(e)
+        return result
+    except (KeyError, TypeError, ValueError) as e:
+        result['error'] = f"malformed record: {e}"
+        return result
+    result['moves'] = len(record['moves'])
+    if 'score' in record and record['score'] != score:
+        result['error'] = f"claimed score {record['score']}, replayed {score}"
+    elif claimed_board is not None and claimed_board != b:
+        result['error'] = f"claimed board {record['board']}, replayed {b:016x}"
+    else:
+        result['ok'] = True
+    return result
+
+def verify_all(records, workers: int = 1, chunksize: int = 16):
+    """(行番号, リプレイ) の列を検証して結果を流す（順不同）"""
+    if workers <= 1:
+        yield from map(verify, records)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(verify, records, chunksize=chunksize)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Verify 2048 replays and claimed scores")
+    ap.add_argument('replays', help="replay file (JSON Lines)")
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('--failures', help="write failing results here (JSON Lines)")
+    args = ap.parse_args(argv)
+
+    records = rp.load_lines(args.replays)
+    ok = bad = moves = 0
+    out = open(args.failures, 'w', encoding='utf-8') if args.failures else None
+    t0 = time.perf_counter()
+    try:
+        for r in verify_all(records, args.workers):
+            moves += r['moves']
+            if r['ok']:
+                ok += 1
+                continue
+            bad += 1
+            if out is not None:
+                out.write(json.dumps(r) + '\n')
+            elif bad <= 20:
+                print(f"line {r['line']}: {r['error']}")
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    total = ok + bad
+    print(f"{total} replays: {ok} verified, {bad} rejected in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} replays/s, {moves / elapsed:.0f} moves/s)")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 ネット対戦（2 盤面、ソケット越し）
+Python 3.8+ で動作
+
+- 自分と相手がそれぞれ自分の盤面で遊び、相手の盤面もリアルタイムで見える
+- 送るのは最初の出現シードと、その後の移動だけ。相手側で同じ盤面を再現する
+- 定期的に盤面ハッシュを送り、ずれ（desync）を検出する
+- 往復時間（ping）と同期遅延（相手が動いてから自分の画面に反映されるまで）を表示
+
+    HELLO <seed>              最初に 1 回
+    M <seq> <dir> <time>      移動（dir は 0..3 = up/down/left/right）
+    H <seq> <hash>            seq 手目の後の盤面ハッシュ
+    P <t> / O <t>             ping / pong
+    END <seq>                 もう打たない（seq 手で終わり）
+    BYE
+
+  python game_2048vs.py host --port 2049                # 既定は 127.0.0.1 だけで待つ
+  python game_2048vs.py host --bind 0.0.0.0 --port 2049  # 他のマシンから入れる
+  python game_2048vs.py join --host 127.0.0.1 --port 2049
+  python game_2048vs.py selftest --moves 300
+"""
+
+import argparse
+import asyncio
+import curses
+import hashlib
+import random
+import struct
+import sys
+import time
+
+import game_2048ai as ai
+import game_2048bb as bb
+
+SIZE = 4
+HASH_INTERVAL = 16
+PING_INTERVAL = 1.0
+
+def board_hash(b: int, score: int) -> str:
+    return hashlib.blake2b(struct.pack('<QQ', b, score), digest_size=8).hexdigest()
+
+def percentile(xs: list, q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+# ---------- 盤面 1 つ分 ----------
+class Side:
+    """シードから決まる 1 人分の盤面（自分側も相手の再現側も同じ）"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.board = bb.new_game(self.rng)
+        self.score = 0
+        self.seq = 0
+
+    def step(self, d: int) -> bool:
+        nb, moved, gained = bb.move(self.board, d)
+        if not moved:
+            return False
+        self.board = bb.add_random_tile(nb, self.rng)
+        self.score += gained
+        self.seq += 1
+        return True
+
+    def hash(self) -> str:
+        return board_hash(self.board, self.score)
+
+    def over(self) -> bool:
+        return bb.lost(self.board)
+
+# ---------- 接続 ----------
+class Link:
+    """自分の手を送り、相手の手で相手の盤面を再現する"""
+
+    def __init__(self, reader, writer, seed: int):
+        self.reader = reader
+        self.writer = writer
+        self.local = Side(seed)
+        self.remote = None
+        self.rtts = []
+        self.lags = []
+        self.hash_checks = 0
+        self.desync = None         # ずれを見つけたら説明の文字列
+        self.remote_done = None    # 相手が END を送ってきたら最終手数
+        self.closed = False
+        self.changed = asyncio.Event()
+
+    def _send(self, line: str) -> None:
+        if not self.closed:
+            self.writer.write(line.encode() + b'\n')
+
+    async def handshake(self, seed: int) -> None:
+        self._send(f"HELLO {seed}")
+        try:
+            line = await self.reader.readline()
+            parts = line.split()
+            if len(parts) != 2 or parts[0] != b'HELLO':
+                raise ValueError(f"expected HELLO <seed>, got {line!r}")
+            self.remote = Side(int(parts[1]))
+        except ValueError as e:
+            # 長すぎる行・数でないシードも含めて、相手にエラー行を返して切る
+            self._send("ERR bad handshake")
+            self.closed = True
+            self.writer.close()
+            raise ConnectionError(f"bad handshake: {e}") from None
+
+    def play(self, d: int) -> bool:
+        if not self.local.step(d):
+            return False
+        seq = self.local.seq
+        self._send(f"M {seq} {d} {time.time():.6f}")
+        if seq % HASH_INTERVAL == 0:
+            self._send(f"H {seq} {self.local.hash()}")
+        self.changed.set()
+        return True
+
+    async def receive(self) -> None:
+        remote = self.remote
+        try:
+            while True:
+                try:
+                    line = await self.reader.readline()
+                except ValueError as e:
+                    # 区切りのない長すぎる行。line はまだ前の行なので、ここで別に扱う
+                    self.desync = self.desync or f"protocol error: {e}"
+                    break
+                if not line:
+                    break
+                parts = line.split()
+                kind = parts[0]
+                if kind == b'M':
+                    seq, d = int(parts[1]), int(parts[2])
+                    if seq != remote.seq + 1 or not remote.step(d):
+                        self.desync = self.desync or f"move {seq} does not apply"
+                    self.lags.append(time.time() - float(parts[3]))
+                    self.changed.set()
+                elif kind == b'H':
+                    seq = int(parts[1])
+                    self.hash_checks += 1
+                    if seq == remote.seq and parts[2].decode() != remote.hash():
+                        self.desync = self.desync or f"hash mismatch at move {seq}"
+                        self.changed.set()
+                elif kind == b'P':
+                    self._send(f"O {parts[1].decode()}")
+                elif kind == b'O':
+                    self.rtts.append(time.perf_counter() - float(parts[1]))
+                elif kind == b'END':
+                    self.remote_done = int(parts[1])
+                    if self.remote_done != remote.seq:
+                        self.desync = self.desync or f"ended at {self.remote_done}, mirrored {remote.seq}"
+                    self.changed.set()
+                elif kind == b'BYE':
+                    break
+        except ConnectionError:
+            pass
+        except (IndexError, ValueError) as e:
+            # 空行や壊れた行。相手の盤面はもう信用できないので、ずれとして打ち切る
+            self.desync = self.desync or f"protocol error on {line!r}: {e}"
+        finally:
+            self.closed = True
+            self.changed.set()
+
+    async def pinger(self) -> None:
+        while not self.closed:
+            self._send(f"P {time.perf_counter():.9f}")
+            await asyncio.sleep(PING_INTERVAL)
+
+    def finish(self) -> None:
+        """自分はもう打たないことを知らせる"""
+        self._send(f"H {self.local.seq} {self.local.hash()}")
+        self._send(f"END {self.local.seq}")
+
+    async def wait_remote(self) -> None:
+        """相手が END を送るか切断するまで待つ"""
+        while self.remote_done is None and not self.closed:
+            self.changed.clear()
+            await self.changed.wait()
+
+    def close(self) -> None:
+        self._send("BYE")
+        self.closed = True
+        self.writer.close()
+
+    def stats(self) -> str:
+        rtt = percentile(self.rtts, 0.5) * 1000
+        lag = percentile(self.lags, 0.5) * 1000
+        sync = self.desync or f"in sync ({self.hash_checks} checks)"
+        return f"RTT {rtt:.2f} ms  lag {lag:.2f} ms  {sync}"
+
+# ---------- 描画 ----------
+def draw(stdscr, link: Link) -> None:
+    stdscr.erase()
+    h, w = stdscr.getmaxyx()
+    title = "2048 ネット対戦 (HJKL: 移動, Q: 終了)"
+    stdscr.addstr(0, max(0, (w - len(title)) // 2), title, curses.A_BOLD)
+    cell_w = 6
+    for i, (name, side) in enumerate((("You", link.local),
+                                      ("Opponent", link.remote))):
+        x0 = 2 + i * (cell_w * SIZE + 6)
+        stdscr.addstr(2, x0, f"{name}: {side.score}")
+        board = bb.unpack(side.board)
+        for r in range(SIZE):
+            for c in range(SIZE):
+                val = board[r][c]
+                txt = " ".center(cell_w) if val == 0 else str(val).center(cell_w)
+                stdscr.addstr(4 + r * 2, x0 + c * cell_w, txt, curses.A_BOLD)
+        if side.over():
+            stdscr.addstr(4 + SIZE * 2, x0, "Game Over!", curses.A_BLINK)
+        elif i == 1 and link.remote_done is not None:
+            stdscr.addstr(4 + SIZE * 2, x0, "Finished.")
+    stdscr.addstr(6 + SIZE * 2, 2, link.stats())
+    if link.closed:
+        stdscr.addstr(7 + SIZE * 2, 2, "Opponent left.")
+    stdscr.refresh()
+
+KEY_DIRS = {
+    curses.KEY_UP: bb.UP, ord('k'): bb.UP,
+    curses.KEY_DOWN: bb.DOWN, ord('j'): bb.DOWN,
+    curses.KEY_LEFT: bb.LEFT, ord('h'): bb.LEFT,
+    curses.KEY_RIGHT: bb.RIGHT, ord('l'): bb.RIGHT,
+}
+
+async def play_curses(stdscr, link: Link) -> None:
+    loop = asyncio.get_running_loop()
+    quit_ev = asyncio.Event()
+
+    def on_input() -> None:
+        while True:
+            key = stdscr.getch()
+            if key == -1:
+                return
+            if key in (ord('q'), ord('Q')):
+                quit_ev.set()
+            elif key in KEY_DIRS:
+                link.play(KEY_DIRS[key])
+
+    fd = sys.stdin.fileno()
+    loop.add_reader(fd, on_input)
+    quitting = asyncio.ensure_future(quit_ev.wait())
+    try:
+        while not quit_ev.is_set():
+            draw(stdscr, link)
+            link.changed.clear()
+            changed = asyncio.ensure_future(link.changed.wait())
+            await asyncio.wait([changed, quitting],
+                               return_when=asyncio.FIRST_COMPLETED)
+            changed.cancel()
+        link.finish()
+    finally:
+        quitting.cancel()
+        loop.remove_reader(fd)
+
+async def play_ai(link: Link, moves: int, depth: int, delay: float) -> None:
+    """AI が自分側を打つ（selftest や観戦用）"""
+    while link.local.seq < moves and not link.closed:
+        d, _ = ai.best_move(link.local.board, depth)
+        if d is None:
+            break
+        link.play(d)
+        await link.writer.drain()
+        await asyncio.sleep(delay)
+
+# ---------- 接続の確立 ----------
+async def session(reader, writer, seed: int, player) -> Link:
+    link = Link(reader, writer, seed)
+    await link.handshake(seed)
+    tasks = [asyncio.create_task(link.receive()),
+             asyncio.create_task(link.pinger())]
+    try:
+        await player(link)
+    finally:
+        link.close()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return link
+
+async def host(port: int, seed: int, player, ready=None, bind: str = '127.0.0.1') -> Link:
+    conn = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+        if not conn.done():
+            conn.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_connect, bind, port)
+    if ready is not None:
+        ready.set()
+    reader, writer = await conn
+    server.close()
+    return await session(reader, writer, seed, player)
+
+async def join(addr: str, port: int, seed: int, player) -> Link:
+    reader, writer = await asyncio.open_connection(addr, port)
+    return await session(reader, writer, seed, player)
+
+async def selftest(port: int, moves: int, depth: int, delay: float) -> str:
+    """localhost で AI 同士を対戦させ、最後に両側の再現盤面を突き合わせる"""
+    async def player(link):
+        await play_ai(link, moves, depth, delay)
+        link.finish()
+        await link.wait_remote()          # 相手の最後の手まで受け取る
+
+    ready = asyncio.Event()
+    hosting = asyncio.create_task(host(port, 1, player, ready))
+    await ready.wait()
+    b = await join('127.0.0.1', port, 2, player)
+    a = await hosting
+    ok = (a.remote.board == b.local.board and b.remote.board == a.local.board)
+    return (f"host: {a.stats()}\njoin: {b.stats()}\n"
+            f"final boards {'match' if ok else 'DIFFER'} "
+            f"({a.local.seq} and {b.local.seq} moves)")
+
+# ---------- エントリポイント ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Two-board networked 2048 versus")
+    ap.add_argument('mode', choices=('host', 'join', 'selftest'))
+    ap.add_argument('--host', default='127.0.0.1', help="address to join")
+    ap.add_argument('--bind', default='127.0.0.1',
+                    help="address to listen on when hosting (0.0.0.0 = all interfaces)")
+    ap.add_argument('--port', type=int, default=2049)
+    ap.add_argument('--seed', type=int, default=None, help="spawn seed")
+    ap.add_argument('--moves', type=int, default=300, help="selftest moves")
+    ap.add_argument('--depth', type=int, default=1, help="selftest AI depth")
+    ap.add_argument('--delay', type=float, default=0.005,
+                    help="selftest seconds between moves")
+    args = ap.parse_args(argv)
+
+    if args.mode == 'selftest':
+        print(asyncio.run(selftest(args.port, args.moves, args.depth, args.delay)))
+        return 0
+
+    seed = args.seed if args.seed is not None else random.getrandbits(32)
+
+    def run(stdscr):
+        curses.curs_set(0)
+        stdscr.nodelay(True)
+        stdscr.keypad(True)
+
+        async def player(link):
+            await play_curses(stdscr, link)
+
+        if args.mode == 'host':
+            stdscr.addstr(0, 0, f"Waiting for an opponent on {args.bind}:{args.port}...")
+            stdscr.refresh()
+            return asyncio.run(host(args.port, seed, player, bind=args.bind))
+        return asyncio.run(join(args.host, args.port, seed, player))
+
+    try:
+        link = curses.wrapper(run)
+    except KeyboardInterrupt:
+        return 0
+    except ConnectionError as e:
+        print(f"connection failed: {e}", file=sys.stderr)
+        return 1
+    print(f"You: {link.local.score}  Opponent: {link.remote.score}  ({link.stats()})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
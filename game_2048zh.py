@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+2048 Zobrist ハッシュの確認（衝突率と速度）
+Python 3.8+ で動作
+
+- 衝突: ランダム対局で出た異なる盤面を集め、64bit で衝突がないこと、
+  下位 k bit に切ったときの衝突数が理想的なハッシュの期待値から 5σ（σ ≈ √期待値）以内であることを確かめる
+- 差分更新: ランダムな盤面の全方向で、move_hashed が move と zobrist(移動後) に一致することを確かめる
+- どれかが外れたら終了コード 1
+- 速度: 盤面全体のハッシュ、移動してから全体を計算し直す場合と move_hashed（差分表）、
+  出現ごとの差分更新、リスト盤面の hash(tuple(map(tuple, board))) を比べる
+
+  python game_2048zh.py --boards 200000 --bits 24
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+import game_2048bb as bb
+
+def collect(n: int, seed: int = 0) -> list:
+    """ランダムに打って異なる盤面を n 個集める"""
+    rng = random.Random(seed)
+    seen = set()
+    b = bb.new_game(rng)
+    while len(seen) < n:
+        seen.add(b)
+        mask = bb.legal_moves(b)
+        if not mask:
+            b = bb.new_game(rng)
+            continue
+        d = rng.choice([d for d in range(4) if mask >> d & 1])
+        b = bb.add_random_tile(bb.move(b, d)[0], rng)
+    return list(seen)
+
+def collisions(hashes: list, bits: int) -> int:
+    mask = (1 << bits) - 1
+    return len(hashes) - len({h & mask for h in hashes})
+
+def expected_collisions(n: int, bits: int) -> float:
+    """n 個を 2**bits 個の箱に一様に投げたときの衝突数の期待値"""
+    m = 1 << bits
+    return n - m * (1 - (1 - 1 / m) ** n)
+
+SIGMAS = 5    # 下位 bit の衝突数が期待値からこの σ 以上ずれたら失敗
+
+def collision_report(boards: list, bits: int) -> tuple:
+    """Returns: (表示の文字列, 問題なければ True)"""
+    hashes = [bb.zobrist(b) for b in boards]
+    full = collisions(hashes, 64)
+    low = collisions(hashes, bits)
+    expect = expected_collisions(len(boards), bits)
+    # 衝突数は期待値が小さくない範囲でほぼポアソン分布なので σ ≈ √期待値（+1 は期待値が小さいとき用）
+    bound = SIGMAS * math.sqrt(expect) + 1
+    ok = full == 0 and abs(low - expect) <= bound
+    return (f"{len(boards)} distinct boards: {full} collisions in 64 bits; "
+            f"{low} in the low {bits} bits "
+            f"(uniform hashing expects {expect:.0f} ±{bound:.0f})"
+            f"{'' if ok else ' FAIL'}"), ok
+
+def random_board(rng) -> int:
+    """各マスが空きか 2..2048 の、対局では出ないものも含むランダムな盤面"""
+    b = 0
+    for s in range(0, 64, 4):
+        if rng.random() < 0.6:
+            b |= rng.randint(1, 11) << s
+    return b
+
+def incremental_check(n: int, seed: int = 0) -> tuple:
+    """
+    ランダムな n 盤面 × 4 方向で move_hashed を move + zobrist と突き合わせる
+    Returns: (表示の文字列, 問題なければ True)
+    """
+    rng = random.Random(seed)
+    for _ in range(n):
+        b = random_board(rng)
+        h = bb.zobrist(b)
+        for d in range(4):
+            nb, moved, gained = bb.move(b, d)
+            got = bb.move_hashed(b, h, d)
+            if got != (nb, bb.zobrist(nb), moved, gained):
+                return (f"move_hashed MISMATCH on {b:016x} direction {d}: "
+                        f"got {got}, expected {(nb, bb.zobrist(nb), moved, gained)}"), False
+    return f"move_hashed matches move + zobrist on {n} random boards x 4 directions", True
+
+def _rate(fn, items) -> float:
+    t0 = time.perf_counter()
+    fn(items)
+    return len(items) / max(time.perf_counter() - t0, 1e-9)
+
+def throughput_report(boards: list, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    moves = []
+    spawns = []
+    for b in boards:
+        mask = bb.legal_moves(b)
+        if mask:
+            d = rng.choice([d for d in range(4) if mask >> d & 1])
+            nb = bb.move(b, d)[0]
+            moves.append((b, bb.zobrist(b), d))
+            spawns.append((nb, bb.zobrist(nb), bb.add_random_tile(nb, rng)))
+    lists = [bb.unpack(b) for b in boards]
+    zobrist, move, move_hashed, spawn = bb.zobrist, bb.move, bb.move_hashed, bb.zobrist_spawn
+
+    def full(items):
+        for b in items:
+            zobrist(b)
+
+    def move_only(items):
+        for b, h, d in items:
+            move(b, d)
+
+    def move_then_full(items):
+        for b, h, d in items:
+            zobrist(move(b, d)[0])
+
+    def move_incremental(items):
+        for b, h, d in items:
+            move_hashed(b, h, d)
+
+    def after_spawn(items):
+        for b, h, nb in items:
+            spawn(h, b, nb)
+
+    def nested(items):
+        for board in items:
+            hash(tuple(map(tuple, board)))
+
+    rows = [("zobrist(board)", _rate(full, boards)),
+            ("move (no hash)", _rate(move_only, moves)),
+            ("move + zobrist(new board)", _rate(move_then_full, moves)),
+            ("move_hashed (delta tables)", _rate(move_incremental, moves)),
+            ("update after a spawn", _rate(after_spawn, spawns)),
+            ("hash(tuple(map(tuple, board)))", _rate(nested, lists))]
+    return "\n".join(f"{name:32s} {rate / 1e6:6.2f} M/s" for name, rate in rows)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Check Zobrist hash collisions and speed")
+    ap.add_argument('--boards', type=int, default=200000)
+    ap.add_argument('--bits', type=int, default=24,
+                    help="truncated width for the collision comparison")
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args(argv)
+
+    boards = collect(args.boards, args.seed)
+    ok = True
+    for text, passed in (collision_report(boards, args.bits),
+                         incremental_check(args.boards // 4, args.seed)):
+        print(text)
+        ok = ok and passed
+    print(throughput_report(boards, args.seed + 1))
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())